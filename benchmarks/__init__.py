@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the tutorial modules.
+
+Run with ``python -m benchmarks run`` from the repository root and compare
+two reports with ``python -m benchmarks compare base.json new.json``.
+"""
+
+from .harness import REGISTRY, Skip, benchmark, compare, measure, run
@@ -0,0 +1,64 @@
+import argparse
+import sys
+
+from . import startup
+from .harness import compare, dump, load, run
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run benchmarks and write a JSON report')
+    run_parser.add_argument('patterns', nargs='*', default=['*'],
+                            help='glob patterns selecting benchmarks by name (default: all)')
+    run_parser.add_argument('-o', '--output', default='-', help='report path, or - for stdout (default)')
+    run_parser.add_argument('--quick', action='store_true', help='run a reduced parameter sweep')
+    run_parser.add_argument('--min-time', type=float, default=None,
+                            help='minimum seconds per timing sample')
+    run_parser.add_argument('--repeat', type=int, default=None, help='number of timing samples')
+
+    compare_parser = commands.add_parser('compare', help='compare two JSON reports')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='relative slowdown reported as a regression (default: 0.1)')
+
+    startup_parser = commands.add_parser('startup', help='check import times against their budgets')
+    startup_parser.add_argument('targets', nargs='*',
+                                help='targets to measure: knn, c_buffer, algorithms-cold, algorithms (default: all)')
+    startup_parser.add_argument('-o', '--output', default=None, help='also write a JSON report to this path')
+    startup_parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module')
+    startup_parser.add_argument('--scale', type=float, default=1.0,
+                                help='multiply every budget by this factor (default: 1.0)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'startup':
+        unknown = set(args.targets) - {target.name for target in startup.TARGETS}
+        if unknown:
+            parser.error(f"unknown startup target(s): {', '.join(sorted(unknown))}")
+        report = startup.run(args.targets, repeat=args.repeat, scale=args.scale, log=print)
+        if args.output is not None:
+            dump(report, args.output)
+        return 1 if startup.over_budget(report) else 0
+
+    if args.command == 'run':
+        log = lambda line: print(line, file=sys.stderr)
+        report = run(args.patterns, quick=args.quick, min_time=args.min_time, repeat=args.repeat, log=log)
+        dump(report, args.output)
+        return 0
+
+    regressions, improvements = compare(load(args.base), load(args.new), args.threshold)
+    for title, changes in (('Regressions', regressions), ('Improvements', improvements)):
+        if changes:
+            print(f'{title} (threshold {args.threshold:.0%}):')
+            for change in sorted(changes, key=lambda change: change.ratio, reverse=True):
+                print(f'  {change.name}[{change.params}]  {change.base * 1e6:.2f} us -> '
+                      f'{change.new * 1e6:.2f} us  ({change.ratio:.2f}x)')
+    if not regressions:
+        print('No regressions.')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+CircularBuffer throughput. Each case pushes a fixed number of items so the
+timings are comparable across capacities; alloc_peak in the report shows what
+the operation allocates on top of the preallocated storage.
+"""
+
+from .harness import add_path, benchmark
+
+
+add_path('m2_context')
+
+from c_buffer import CircularBuffer  # noqa: E402
+
+ITEMS = 10_000
+
+
+@benchmark('buffer.add', capacity=(16, 1024, 65536))
+def add(capacity: int):
+    buffer = CircularBuffer(capacity)
+    items = list(range(ITEMS))
+
+    def run():
+        for item in items:
+            buffer.add(item)
+    return run
+
+
+@benchmark('buffer.extend', capacity=(16, 1024, 65536), chunk=(1, 64, 4096),
+           quick={'chunk': (64,)})
+def extend(capacity: int, chunk: int):
+    buffer = CircularBuffer(capacity)
+    chunks = [list(range(start, start + chunk)) for start in range(0, ITEMS, chunk)]
+
+    def run():
+        for items in chunks:
+            buffer.extend(items)
+    return run
+
+
+@benchmark('buffer.read', capacity=(16, 1024, 65536), wrapped=(False, True))
+def read(capacity: int, wrapped: bool):
+    buffer = CircularBuffer(capacity)
+    for item in range(capacity + (capacity // 2 if wrapped else 0)):
+        buffer.add(item)
+    return buffer.read
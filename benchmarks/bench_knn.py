@@ -0,0 +1,40 @@
+"""
+k-NN scaling sweeps: the reference classify_point over training size, k and
+dimension, plus the batch engine over the same data when NumPy is available.
+"""
+
+import random
+
+from .harness import Skip, add_path, benchmark
+
+
+add_path('m1_the_loop')
+
+import knn  # noqa: E402
+
+
+def make_data(n: int, dimensions: int, classes: int = 4, seed: int = 0):
+    rng = random.Random(seed)
+    training_data = [([rng.uniform(-1.0, 1.0) for _ in range(dimensions)], f'class_{rng.randrange(classes)}')
+                     for _ in range(n)]
+    queries = [[rng.uniform(-1.0, 1.0) for _ in range(dimensions)] for _ in range(64)]
+    return training_data, queries
+
+
+@benchmark('knn.classify_point', n=(100, 1000, 10000), k=(1, 5, 25), dimensions=(2, 8, 32),
+           quick={'n': (100, 1000), 'k': (5,), 'dimensions': (2, 8)})
+def classify_point(n: int, k: int, dimensions: int):
+    training_data, queries = make_data(n, dimensions)
+    query = queries[0]
+    return lambda: knn.classify_point(training_data, query, k)
+
+
+@benchmark('knn.classify_batch', n=(1000, 10000), k=(5, 25), dimensions=(2, 32), queries=(64, 1024),
+           quick={'n': (1000,), 'k': (5,), 'queries': (64,)})
+def classify_batch(n: int, k: int, dimensions: int, queries: int):
+    if knn.np is None:
+        raise Skip("NumPy is not installed")
+    training_data, _ = make_data(n, dimensions)
+    rng = random.Random(1)
+    points = [[rng.uniform(-1.0, 1.0) for _ in range(dimensions)] for _ in range(queries)]
+    return lambda: knn.classify_batch(training_data, points, k)
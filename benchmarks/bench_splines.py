@@ -0,0 +1,95 @@
+"""
+Construction and evaluation of the m3 splines over knot count, boundary
+condition and the trailing shape of y.
+
+algorithms.py is a module lifted out of scipy.interpolate and keeps its
+relative imports, so it is loaded under that package name and the suite is
+skipped when SciPy is not installed.
+"""
+
+import importlib.util
+import os
+import sys
+
+from .harness import ROOT, Skip, benchmark
+
+
+# load_algorithms imports algorithms.py under this name.
+ALGORITHMS = 'scipy.interpolate._m3_algorithms'
+_algorithms = None
+
+
+def load_algorithms():
+    global _algorithms
+    if _algorithms is None:
+        try:
+            import numpy  # noqa: F401
+            import scipy.interpolate  # noqa: F401
+        except ImportError as exc:
+            raise Skip(f"requires NumPy and SciPy ({exc})") from None
+        path = os.path.join(ROOT, 'm3_reading_code', 'algorithms.py')
+        spec = importlib.util.spec_from_file_location(ALGORITHMS, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[spec.name]
+            raise
+        _algorithms = module
+    return _algorithms
+
+
+def make_curve(knots: int, trailing: tuple, periodic: bool = False, seed: int = 0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, knots))
+    y = rng.standard_normal((knots,) + trailing)
+    if periodic:
+        y[-1] = y[0]
+    return x, y
+
+
+TRAILING = ((), (8,), (64,))
+
+
+@benchmark('splines.alg1.build', knots=(10, 100, 1000, 10000),
+           bc_type=('not-a-knot', 'natural', 'clamped', 'periodic'), trailing=TRAILING,
+           cached=(False, True), quick={'knots': (10, 1000), 'trailing': ((), (8,)), 'cached': (False,)})
+def alg1_build(knots: int, bc_type: str, trailing: tuple, cached: bool):
+    alg1 = load_algorithms().alg1
+    x, y = make_curve(knots, trailing, periodic=bc_type == 'periodic')
+    if cached:
+        return lambda: alg1(x, y, bc_type=bc_type)
+
+    def run():
+        # Every build factorizes from scratch, as for a stream of new knots.
+        alg1.cache_clear()
+        alg1(x, y, bc_type=bc_type)
+    return run
+
+
+@benchmark('splines.alg2.build', knots=(10, 100, 1000, 10000), trailing=TRAILING,
+           quick={'knots': (10, 1000), 'trailing': ((), (8,))})
+def alg2_build(knots: int, trailing: tuple):
+    alg2 = load_algorithms().alg2
+    x, y = make_curve(knots, trailing)
+    return lambda: alg2(x, y)
+
+
+@benchmark('splines.evaluate', kind=('alg1', 'alg2'), method=('call', 'evaluate'), knots=(100, 10000),
+           trailing=TRAILING, queries=(1000, 100000), order=('sorted', 'random'),
+           quick={'knots': (100,), 'trailing': ((),), 'queries': (1000,)})
+def evaluate(kind: str, method: str, knots: int, trailing: tuple, queries: int, order: str):
+    import numpy as np
+
+    spline = getattr(load_algorithms(), kind)(*make_curve(knots, trailing))
+    rng = np.random.default_rng(1)
+    points = rng.uniform(spline.x[0], spline.x[-1], queries)
+    if order == 'sorted':
+        points.sort()
+    if method == 'call':
+        return lambda: spline(points)
+    out = np.empty((queries,) + trailing)
+    return lambda: spline.evaluate(points, out=out)
@@ -0,0 +1,239 @@
+"""
+A small, stdlib-only benchmark harness.
+
+Benchmarks register themselves with the @benchmark decorator. Each one is a
+setup function that receives one combination of its parameter grid and
+returns the zero-argument callable to time, so data generation never counts
+towards the measurement. Results are plain dicts that serialize to JSON and
+can be compared between two runs with compare().
+"""
+
+import fnmatch
+import gc
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Benchmark(NamedTuple):
+    """
+    A registered benchmark.
+
+    params maps each parameter name to the values swept in a full run;
+    quick_params, when given, overrides some of them with a smaller sweep.
+    """
+    name: str
+    setup: Callable[..., Callable[[], Any]]
+    params: Dict[str, Tuple]
+    quick_params: Dict[str, Tuple]
+
+    def cases(self, quick: bool = False) -> Iterable[Dict[str, Any]]:
+        grid = dict(self.params, **self.quick_params) if quick else self.params
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            yield dict(zip(names, values))
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, quick: Optional[Dict[str, Tuple]] = None, **params: Tuple):
+    """
+    Registers a setup function as the benchmark `name`, swept over the
+    cartesian product of `params`.
+    """
+    def register(setup):
+        if name in REGISTRY:
+            raise ValueError(f"Benchmark {name!r} is already registered.")
+        REGISTRY[name] = Benchmark(name, setup, params, quick or {})
+        return setup
+    return register
+
+
+class Skip(Exception):
+    """Raised by a setup function when a case cannot run in this environment."""
+
+
+def add_path(*parts: str) -> None:
+    """Makes a tutorial module directory importable, the same way its tests do."""
+    path = os.path.join(ROOT, *parts)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.05, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Times func like timeit: the loop count is calibrated so one sample takes
+    at least min_time seconds, then `repeat` samples are taken with the garbage
+    collector disabled. Allocation figures come from a separate traced call.
+    """
+    number = 1
+    while True:
+        elapsed = _time(func, number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= max(2, min(10, int(min_time / max(elapsed, 1e-9)) + 1))
+    samples = [_time(func, number) / number for _ in range(repeat)]
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if repeat > 1 else 0.0,
+        'alloc_peak': peak,
+        'alloc_retained': current,
+        'alloc_blocks': blocks,
+    }
+
+
+def _time(func: Callable[[], Any], number: int) -> float:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def environment() -> Dict[str, Any]:
+    """Describes the machine and revision a run was made on."""
+    info = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': None,
+    }
+    for module in ('numpy', 'scipy'):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    try:
+        info['revision'] = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def run(patterns: Iterable[str] = ('*',), quick: bool = False, min_time: Optional[float] = None,
+        repeat: Optional[int] = None, log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Runs every registered benchmark whose name matches one of the glob
+    patterns and returns the JSON-ready report.
+    """
+    from . import bench_buffer, bench_knn, bench_splines  # noqa: F401  (registers the benchmarks)
+
+    min_time = min_time if min_time is not None else (0.01 if quick else 0.05)
+    repeat = repeat if repeat is not None else (3 if quick else 5)
+    patterns = list(patterns)
+    results = []
+    for name, bench in sorted(REGISTRY.items()):
+        if not any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+            continue
+        for params in bench.cases(quick):
+            entry = {'name': name, 'params': params}
+            try:
+                func = bench.setup(**params)
+            except Skip as exc:
+                entry['skipped'] = str(exc)
+            else:
+                entry.update(measure(func, min_time, repeat))
+            results.append(entry)
+            if log is not None:
+                log(format_result(entry))
+    return {'environment': environment(), 'quick': quick, 'results': results}
+
+
+def format_result(entry: Dict[str, Any]) -> str:
+    label = f"{entry['name']}[{case_id(entry['params'])}]"
+    if 'skipped' in entry:
+        return f"{label:<72} skipped: {entry['skipped']}"
+    return f"{label:<72} {entry['median'] * 1e6:12.2f} us  {entry['alloc_peak']:>10} B peak"
+
+
+def case_id(params: Dict[str, Any]) -> str:
+    return ','.join(f'{key}={value}' for key, value in params.items())
+
+
+def _key(entry: Dict[str, Any]) -> Tuple[str, str]:
+    # Serialized so a report loaded from JSON, where tuples became lists,
+    # matches one produced in this process.
+    return entry['name'], json.dumps(entry['params'], sort_keys=True)
+
+
+class Change(NamedTuple):
+    """The median time of one case in two runs; ratio > 1 means it got slower."""
+    name: str
+    params: str
+    base: float
+    new: float
+
+    @property
+    def ratio(self) -> float:
+        return self.new / self.base
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.1) -> Tuple[List[Change], List[Change]]:
+    """
+    Matches the cases present and measured in both reports and returns
+    (regressions, improvements): the cases whose median time rose or fell by
+    more than `threshold` as a fraction of the base time.
+    """
+    if threshold < 0:
+        raise ValueError("threshold cannot be negative.")
+    measured = {_key(entry): entry['median'] for entry in base['results'] if 'median' in entry}
+    regressions, improvements = [], []
+    for entry in new['results']:
+        key = _key(entry)
+        if 'median' not in entry or key not in measured:
+            continue
+        change = Change(entry['name'], case_id(entry['params']), measured[key], entry['median'])
+        if change.ratio > 1 + threshold:
+            regressions.append(change)
+        elif change.ratio < 1 / (1 + threshold):
+            improvements.append(change)
+    return regressions, improvements
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def dump(report: Dict[str, Any], path: Optional[str]) -> None:
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path is None or path == '-':
+        sys.stdout.write(text + '\n')
+    else:
+        with open(path, 'w') as handle:
+            handle.write(text + '\n')
@@ -0,0 +1,150 @@
+"""
+Opt-in instrumentation for the three tutorial modules.
+
+knn, c_buffer and algorithms each hold a module-level ``_probe`` that is None
+by default, so an uninstrumented hot path pays one global lookup and an
+``is not None`` test. Installing a Registry there makes those paths record:
+
+    knn.rows_scanned                   training rows whose distance was computed
+    knn.classify_point.{distances,sort,vote}
+    knn.batch.{distances,vote}         timers, per block of queries
+    buffer.overwrites                  items overwritten before being read
+    buffer.lock_wait                   time LockedCircularBuffer spent contended
+    splines.prep_data                  validation timer
+    splines.coeff_bytes                size of each cubic coefficient array
+    splines.alg1.{factorize,solve}     timers for the linear system
+    splines.alg1.branch.<name>         which alg1 boundary-condition path ran:
+                                       tridiagonal, periodic, two-point,
+                                       three-point-not-a-knot,
+                                       three-point-periodic or empty
+
+Installing never imports anything: only modules already in sys.modules are
+instrumented, with algorithms found under the name load_algorithms gives it.
+
+Typical use is the ``enabled`` context manager, which installs a registry for
+one block and restores the previous state afterwards:
+
+    with enabled() as registry:
+        classify_point(training_data, query, k)
+    print(registry.export())
+"""
+
+import contextlib
+import json
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from .bench_splines import ALGORITHMS
+
+MODULES = ('knn', 'c_buffer', ALGORITHMS)
+
+
+class Registry:
+    """
+    Thread-safe named counters and timers.
+
+    Timers keep the number of samples, total, and maximum in seconds.
+    Instrumented code calls count, record and lap; everything else is for
+    reading the results.
+    """
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._timers: Dict[str, List[float]] = {}
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                self._timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    def lap(self, name: str, start: float) -> float:
+        """
+        Records the time since start under name and returns the current clock,
+        so consecutive stages can be timed with one clock read each.
+        """
+        now = self.clock()
+        self.record(name, now - start)
+        return now
+
+    @contextlib.contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Times the enclosed block under name."""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.lap(name, start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns a copy of the current values:
+        {'counters': {name: n}, 'timers': {name: {count, total, mean, max}}}.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            timers = {name: {'count': count, 'total': total, 'mean': total / count, 'max': peak}
+                      for name, (count, total, peak) in self._timers.items()}
+        return {'counters': counters, 'timers': timers}
+
+    def export(self, path: Optional[str] = None) -> str:
+        """Serializes a snapshot to JSON, also writing it to path when given."""
+        text = json.dumps(self.snapshot(), indent=2, sort_keys=True)
+        if path is not None:
+            with open(path, 'w') as handle:
+                handle.write(text + '\n')
+        return text
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+
+def _modules() -> list:
+    return [sys.modules[name] for name in MODULES if name in sys.modules]
+
+
+def install(registry: Optional[Registry]) -> list:
+    """
+    Points every instrumented module that is already imported at registry
+    (None disables recording) and returns the previous probes, for restore.
+    Modules imported afterwards are not instrumented.
+    """
+    previous = []
+    for module in _modules():
+        previous.append((module, module._probe))
+        module._probe = registry
+    return previous
+
+
+def restore(previous: list):
+    for module, probe in previous:
+        module._probe = probe
+
+
+@contextlib.contextmanager
+def enabled(registry: Optional[Registry] = None) -> Iterator[Registry]:
+    """
+    Records into registry (a fresh one by default) for the duration of the
+    block and yields it.
+    """
+    registry = registry if registry is not None else Registry()
+    previous = install(registry)
+    try:
+        yield registry
+    finally:
+        restore(previous)
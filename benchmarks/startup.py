@@ -0,0 +1,103 @@
+"""
+Import-time budgets for the three tutorial modules.
+
+Each target is imported in a fresh interpreter, so nothing is cached from
+the calling process. Its setup runs first and is excluded from the timing.
+algorithms.py subclasses scipy.interpolate.PPoly, and importing
+scipy.interpolate dominates its cold start, so it has two targets:
+``algorithms-cold`` times NumPy, scipy.interpolate and the module together,
+and ``algorithms`` only what the module adds once SciPy is loaded. The
+fastest of `repeat` runs is compared against the budget.
+"""
+
+import subprocess
+import sys
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+from .harness import ROOT, environment
+
+
+class Target(NamedTuple):
+    name: str
+    setup: str
+    statement: str
+    budget: float
+
+
+TARGETS = (
+    Target('knn', "add_path('m1_the_loop')", 'import knn', 0.5),
+    Target('c_buffer', "add_path('m2_context')", 'import c_buffer', 0.5),
+    Target('algorithms-cold', '', 'load_algorithms()', 1.5),
+    Target('algorithms', 'import numpy, scipy.interpolate', 'load_algorithms()', 0.05),
+)
+
+_CHILD = """\
+import sys, time
+sys.path.insert(0, {root!r})
+from benchmarks.harness import add_path
+from benchmarks.bench_splines import load_algorithms
+{setup}
+before = set(sys.modules)
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, len(set(sys.modules) - before))
+"""
+
+
+def measure_import(target: Target, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Times target.statement in `repeat` fresh interpreters and returns the
+    fastest run, plus the number of modules that statement loaded.
+    """
+    code = _CHILD.format(root=ROOT, setup=target.setup, statement=target.statement)
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return {'name': target.name, 'skipped': lines[-1] if lines else f'exit status {proc.returncode}'}
+        seconds, modules = proc.stdout.split()
+        samples.append(float(seconds))
+    return {
+        'name': target.name,
+        'repeat': repeat,
+        'min': min(samples),
+        'max': max(samples),
+        'modules': int(modules),
+        'budget': target.budget,
+        'ok': min(samples) <= target.budget,
+    }
+
+
+def run(names: Optional[Iterable[str]] = None, repeat: int = 5, scale: float = 1.0,
+        log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Measures the selected targets (all by default) with every budget
+    multiplied by scale, for slower machines, and returns the JSON-ready report.
+    """
+    if scale <= 0:
+        raise ValueError("scale must be positive.")
+    names = set(names) if names else None
+    results = []
+    for target in TARGETS:
+        if names is not None and target.name not in names:
+            continue
+        entry = measure_import(target._replace(budget=target.budget * scale), repeat)
+        results.append(entry)
+        if log is not None:
+            log(format_result(entry))
+    return {'environment': environment(), 'scale': scale, 'results': results}
+
+
+def over_budget(report: Dict[str, Any]) -> list:
+    return [entry for entry in report['results'] if not entry.get('ok', True)]
+
+
+def format_result(entry: Dict[str, Any]) -> str:
+    if 'skipped' in entry:
+        return f"{entry['name']:<16} skipped: {entry['skipped']}"
+    status = 'ok' if entry['ok'] else 'OVER BUDGET'
+    return (f"{entry['name']:<16} {entry['min'] * 1e3:9.2f} ms  (budget {entry['budget'] * 1e3:.0f} ms, "
+            f"{entry['modules']} modules)  {status}")
+
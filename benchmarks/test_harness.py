@@ -0,0 +1,96 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.__main__ import main
+from benchmarks.harness import compare, dump, load
+
+
+def make_report(*cases):
+    results = []
+    for name, params, median in cases:
+        entry = {'name': name, 'params': params}
+        if median is None:
+            entry['skipped'] = 'not measured'
+        else:
+            entry['median'] = median
+        results.append(entry)
+    return {'environment': {}, 'results': results}
+
+
+class TestCompare(unittest.TestCase):
+    """Tests that compare sorts matching cases into regressions and improvements."""
+
+    def test_threshold_boundaries(self):
+        """Tests that a change of exactly the threshold is neither a regression nor an improvement."""
+        base = make_report(*((f'case{i}', {}, 1.0) for i in range(4)))
+        new = make_report(('case0', {}, 1.25), ('case1', {}, 1.2500001),
+                          ('case2', {}, 0.8), ('case3', {}, 0.7999999))
+        regressions, improvements = compare(base, new, threshold=0.25)
+        self.assertEqual([change.name for change in regressions], ['case1'])
+        self.assertEqual([change.name for change in improvements], ['case3'])
+        self.assertEqual(compare(base, base, threshold=0.0), ([], []))
+
+    def test_unmatched_and_unmeasured_cases(self):
+        """Tests that cases missing from either report, or skipped in either, are left out."""
+        base = make_report(('only-base', {}, 1.0), ('skipped-new', {}, 1.0), ('skipped-base', {}, None),
+                           ('kept', {'n': 1}, 1.0), ('kept', {'n': 2}, 1.0))
+        new = make_report(('only-new', {}, 9.0), ('skipped-new', {}, None), ('skipped-base', {}, 9.0),
+                          ('kept', {'n': 2}, 9.0))
+        regressions, improvements = compare(base, new)
+        self.assertEqual([(change.name, change.params) for change in regressions], [('kept', 'n=2')])
+        self.assertEqual(improvements, [])
+
+    def test_tuple_params_survive_json(self):
+        """Tests that tuple parameters, which JSON turns into lists, still match after a round trip."""
+        base = make_report(('grid', {'shape': (3, 4), 'kind': 'a'}, 1.0))
+        new = make_report(('grid', {'kind': 'a', 'shape': (3, 4)}, 2.0))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'base.json')
+            dump(base, path)
+            loaded = load(path)
+        self.assertEqual(loaded['results'][0]['params']['shape'], [3, 4])
+        regressions, _ = compare(loaded, new)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0].ratio, 2.0)
+
+    def test_negative_threshold(self):
+        """Tests that a negative threshold raises ValueError."""
+        with self.assertRaises(ValueError):
+            compare(make_report(), make_report(), threshold=-0.1)
+
+
+class TestCompareCommand(unittest.TestCase):
+    """Tests the exit status of python -m benchmarks compare."""
+
+    def run_compare(self, base, new, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ('base.json', 'new.json')]
+            dump(base, paths[0])
+            dump(new, paths[1])
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                status = main(['compare', *paths, *args])
+        return status, output.getvalue()
+
+    def test_exit_status(self):
+        """Tests that only regressions beyond the threshold make the command fail."""
+        base = make_report(('fast', {}, 1.0), ('slow', {}, 1.0))
+        status, output = self.run_compare(base, make_report(('fast', {}, 0.5), ('slow', {}, 1.05)))
+        self.assertEqual(status, 0)
+        self.assertIn('Improvements', output)
+        self.assertIn('No regressions.', output)
+        status, output = self.run_compare(base, make_report(('fast', {}, 1.0), ('slow', {}, 1.5)))
+        self.assertEqual(status, 1)
+        self.assertIn('slow[]', output)
+        status, _ = self.run_compare(base, make_report(('slow', {}, 1.5)), '--threshold', '0.5')
+        self.assertEqual(status, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_splines import load_algorithms
+from benchmarks.harness import Skip, add_path
+from benchmarks.instrument import Registry, enabled, install, restore
+
+add_path('m1_the_loop')
+add_path('m2_context')
+import c_buffer
+import knn
+
+try:
+    algorithms = load_algorithms()
+except Skip:
+    algorithms = None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRegistry(unittest.TestCase):
+    """Tests the counters and timers of Registry."""
+
+    def setUp(self):
+        self.registry = Registry()
+        self.registry.clock = FakeClock()
+
+    def test_counters_and_timers(self):
+        """Tests that count adds up and record keeps count, total, mean and max."""
+        self.registry.count('a')
+        self.registry.count('a', 4)
+        self.registry.record('t', 0.5)
+        self.registry.record('t', 1.5)
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['counters'], {'a': 5})
+        self.assertEqual(snapshot['timers'], {'t': {'count': 2, 'total': 2.0, 'mean': 1.0, 'max': 1.5}})
+
+    def test_lap_and_timer(self):
+        """Tests that lap returns the clock for the next stage and timer records even on errors."""
+        clock = self.registry.clock
+        clock.now = 2.0
+        self.assertEqual(self.registry.lap('stage', 0.5), 2.0)
+        with self.assertRaises(KeyError):
+            with self.registry.timer('block'):
+                clock.now = 5.0
+                raise KeyError
+        timers = self.registry.snapshot()['timers']
+        self.assertEqual(timers['stage']['total'], 1.5)
+        self.assertEqual(timers['block']['total'], 3.0)
+
+    def test_snapshot_export_and_reset(self):
+        """Tests that snapshots are copies, export writes JSON, and reset clears everything."""
+        self.registry.count('a')
+        snapshot = self.registry.snapshot()
+        self.registry.count('a')
+        self.assertEqual(snapshot['counters']['a'], 1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'probe.json')
+            text = self.registry.export(path)
+            with open(path) as handle:
+                self.assertEqual(json.load(handle), json.loads(text))
+        self.assertEqual(json.loads(text)['counters'], {'a': 2})
+        self.registry.reset()
+        self.assertEqual(self.registry.snapshot(), {'counters': {}, 'timers': {}})
+
+    def test_concurrent_counts(self):
+        """Tests that counts from several threads are not lost."""
+        def work():
+            for _ in range(1000):
+                self.registry.count('n')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.registry.snapshot()['counters']['n'], 4000)
+
+
+class TestInstall(unittest.TestCase):
+    """Tests that enabled and restore put back the probes that were installed before."""
+
+    def probes(self):
+        modules = [knn, c_buffer] + ([algorithms] if algorithms is not None else [])
+        return [module._probe for module in modules]
+
+    def test_enabled_restores_probes(self):
+        """Tests that the previous probes come back after the block, also when it raises."""
+        outer = Registry()
+        previous = install(outer)
+        try:
+            with self.assertRaises(RuntimeError):
+                with enabled() as inner:
+                    self.assertTrue(all(probe is inner for probe in self.probes()))
+                    raise RuntimeError
+            self.assertTrue(all(probe is outer for probe in self.probes()))
+        finally:
+            restore(previous)
+        self.assertTrue(all(probe is None for probe in self.probes()))
+
+    def test_imports_nothing(self):
+        """Tests that a module not yet imported is neither imported nor instrumented."""
+        with mock.patch.dict(sys.modules):
+            del sys.modules['knn']
+            with enabled():
+                self.assertNotIn('knn', sys.modules)
+            self.assertIsNone(knn._probe)
+
+
+class TestHooks(unittest.TestCase):
+    """Tests what the instrumented modules record."""
+
+    def test_knn(self):
+        """Tests the rows scanned and the stage timers of classify_point."""
+        training = [((0.0, 0.0), 'a'), ((1.0, 1.0), 'b'), ((0.0, 1.0), 'a')]
+        with enabled() as registry:
+            knn.classify_point(training, (0.0, 0.0), 2)
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['counters']['knn.rows_scanned'], 3)
+        for stage in ('distances', 'sort', 'vote'):
+            self.assertEqual(snapshot['timers'][f'knn.classify_point.{stage}']['count'], 1)
+
+    def test_buffer_overwrites(self):
+        """Tests that overwritten items are counted by add and extend."""
+        buffer = c_buffer.CircularBuffer(3)
+        with enabled() as registry:
+            buffer.extend(range(5))
+            buffer.add(5)
+        self.assertEqual(registry.snapshot()['counters']['buffer.overwrites'], 3)
+
+    @unittest.skipIf(algorithms is None, "SciPy is not installed")
+    def test_alg1_branches(self):
+        """Tests that every alg1 fit is counted under exactly one branch."""
+        import numpy as np
+
+        with enabled() as registry:
+            algorithms.alg1([0.0, 1.0], [0.0, 1.0])
+            algorithms.alg1(np.arange(5.0), np.arange(5.0) ** 2)
+            algorithms.alg1(np.arange(3.0), [0.0, 1.0, 0.0])
+        snapshot = registry.snapshot()
+        branches = {name.rsplit('.', 1)[1]: n for name, n in snapshot['counters'].items()
+                    if name.startswith('splines.alg1.branch.')}
+        self.assertEqual(branches, {'two-point': 1, 'tridiagonal': 1, 'three-point-not-a-knot': 1})
+        self.assertIn('splines.prep_data', snapshot['timers'])
+        self.assertEqual(snapshot['timers']['splines.alg1.factorize']['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import math
+import random
 import unittest
 from collections import Counter
 import sys
@@ -11,7 +12,8 @@ import os
 if os.path.basename(os.getcwd()) == 'm1_the_loop':
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from knn import calculate_distances, get_majority_vote, classify_point
+from knn import calculate_distances, get_majority_vote, classify_point, classify_batch, KNNClassifier, np
+from knn import classify_point_streaming, k_nearest_neighbors, classify_batch_parallel, METRICS
 
 class TestCalculateDistances(unittest.TestCase):
     def setUp(self):
@@ -77,6 +79,165 @@ class TestClassifyPoint(unittest.TestCase):
         # The buggy code will return 'A' (alphabetical). The correct code would return 'B' (closest).
         self.assertEqual(result, 'B', "FAIL: Buggy code chose 'A' alphabetically instead of 'B' (closest).")
 
+
+def make_grid_data(seed, n_points=200, n_labels=4, span=6):
+    """Integer grid points so that equal distances (ties) are common."""
+    rng = random.Random(seed)
+    labels = 'ABCDEFGH'[:n_labels]
+    return [((rng.randint(0, span), rng.randint(0, span)), rng.choice(labels)) for _ in range(n_points)]
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestClassifyBatch(unittest.TestCase):
+    def setUp(self):
+        self.training_data = make_grid_data(seed=1)
+        rng = random.Random(2)
+        self.queries = [(rng.randint(-1, 7), rng.randint(-1, 7)) for _ in range(60)]
+        self.queries += [(rng.uniform(-1, 7), rng.uniform(-1, 7)) for _ in range(60)]
+
+    def test_matches_classify_point(self):
+        for k in (1, 2, 5, 10, len(self.training_data)):
+            expected = [classify_point(self.training_data, q, k) for q in self.queries]
+            self.assertEqual(classify_batch(self.training_data, self.queries, k), expected)
+
+    def test_small_blocks_match(self):
+        expected = [classify_point(self.training_data, q, 7) for q in self.queries]
+        self.assertEqual(classify_batch(self.training_data, self.queries, 7, block_size=3), expected)
+
+    def test_parallel_matches_classify_point(self):
+        expected = [classify_point(self.training_data, q, 5) for q in self.queries]
+        result = classify_batch_parallel(self.training_data, self.queries, 5, workers=2, chunk_size=16)
+        self.assertEqual(result, expected)
+
+    def test_k_too_large(self):
+        with self.assertRaises(ValueError):
+            classify_batch(self.training_data, self.queries, len(self.training_data) + 1)
+
+    def test_empty_inputs(self):
+        self.assertEqual(classify_batch(self.training_data, [], 3), [])
+        self.assertEqual(classify_batch_parallel(self.training_data, [], 3, workers=2), [])
+        self.assertEqual(classify_batch([], [], 0), [])
+        self.assertEqual(classify_batch([], self.queries[:2], 0), [get_majority_vote([])] * 2)
+
+class TestKNNClassifier(unittest.TestCase):
+    def setUp(self):
+        self.training_data = make_grid_data(seed=3, n_points=500, span=20)
+        rng = random.Random(4)
+        self.queries = [(rng.randint(-2, 22), rng.randint(-2, 22)) for _ in range(50)]
+        self.queries += [(rng.uniform(-2, 22), rng.uniform(-2, 22)) for _ in range(50)]
+
+    def test_kd_tree_matches_classify_point(self):
+        model = KNNClassifier(leaf_size=4).fit(self.training_data)
+        for k in (1, 3, 8, 25):
+            for q in self.queries:
+                self.assertEqual(model.predict(q, k), classify_point(self.training_data, q, k))
+
+    def test_duplicate_points(self):
+        training_data = [((1, 1), 'B')] * 40 + [((1, 1), 'A')] * 40 + [((5, 5), 'C')] * 10
+        model = KNNClassifier(leaf_size=2, brute_force_threshold=0).fit(training_data)
+        for k in (1, 39, 41, 80, 85):
+            self.assertEqual(model.predict((1, 1), k), classify_point(training_data, (1, 1), k))
+
+    def test_query_cache(self):
+        model = KNNClassifier(cache_size=2).fit(self.training_data)
+        expected = classify_point(self.training_data, (3, 3), 5)
+        self.assertEqual(model.predict((3, 3), 5), expected)
+        self.assertEqual(model.predict([3, 3], 5), expected)
+        self.assertEqual(model.cache_info()[:2], (1, 1))
+        model.predict((4, 4), 5)
+        model.predict((5, 5), 5)  # Evicts (3, 3), the least recently used entry.
+        model.predict((3, 3), 5)
+        self.assertEqual(model.cache_info(), (1, 4, 2, 2))
+
+    def test_query_cache_invalidated_by_fit(self):
+        model = KNNClassifier(cache_size=8).fit(self.training_data)
+        model.predict((3, 3), 1)
+        relabeled = [(point, 'Z') for point, _ in self.training_data]
+        self.assertEqual(model.fit(relabeled).predict((3, 3), 1), 'Z')
+        self.assertEqual(model.cache_info().hits, 0)
+
+    def test_incremental_updates_match_classify_point(self):
+        rng = random.Random(7)
+        model = KNNClassifier(leaf_size=4, brute_force_threshold=20, cache_size=16).fit(self.training_data[:10])
+        current = list(self.training_data[:10])
+        for step in range(400):
+            if current and rng.random() < 0.4:
+                row = rng.choice(current)
+                model.remove(*row)
+                current.remove(row)
+            else:
+                row = ((rng.randint(0, 20), rng.randint(0, 20)), rng.choice('ABCD'))
+                model.add(*row)
+                current.append(row)
+            if step % 10 == 0 and len(current) >= 5:
+                q = (rng.randint(0, 20), rng.randint(0, 20))
+                self.assertEqual(model.predict(q, 5), classify_point(current, q, 5))
+        self.assertEqual(model.training_data, current)
+        model.compact()
+        self.assertEqual(model.predict((10, 10), 5), classify_point(current, (10, 10), 5))
+
+    def test_remove_missing_row(self):
+        model = KNNClassifier().fit(self.training_data)
+        with self.assertRaises(ValueError):
+            model.remove((100, 100), 'A')
+
+    def test_brute_force_fallback(self):
+        model = KNNClassifier().fit(self.training_data[:10])
+        self.assertIsNone(model._tree)
+        self.assertEqual(model.predict((2, 2), 3), classify_point(self.training_data[:10], (2, 2), 3))
+        with self.assertRaises(ValueError):
+            model.predict((2, 2), 11)
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(6)
+        # Offset, half-integer coordinates: plenty of exact ties and a large
+        # common mean that stresses the ||a||^2 + ||b||^2 - 2a.b expansion.
+        offset = [rng.uniform(0, 1e4) for _ in range(16)]
+        self.training_data = [(tuple(o + 0.5 * rng.randint(0, 3) for o in offset), rng.choice('ABCD'))
+                              for _ in range(150)]
+        self.queries = [tuple(o + 0.5 * rng.randint(0, 3) for o in offset) for _ in range(20)]
+        self.queries += [tuple(o + rng.uniform(0, 2) for o in offset) for _ in range(20)]
+
+    def test_batch_matches_classify_point(self):
+        for metric in METRICS:
+            for k in (1, 6, 150):
+                expected = [classify_point(self.training_data, q, k, metric) for q in self.queries]
+                self.assertEqual(classify_batch(self.training_data, self.queries, k, metric=metric), expected, metric)
+
+    def test_kd_tree_matches_classify_point(self):
+        for metric in ('sqeuclidean', 'manhattan', 'chebyshev'):
+            model = KNNClassifier(leaf_size=4, brute_force_threshold=0, metric=metric).fit(self.training_data)
+            for q in self.queries:
+                self.assertEqual(model.predict(q, 5), classify_point(self.training_data, q, 5, metric), metric)
+
+    def test_scalar_metrics(self):
+        self.assertEqual(calculate_distances([((1, 2, 3), 'A')], (4, 6, 3), 'manhattan'), [(7, 'A')])
+        self.assertEqual(calculate_distances([((1, 2, 3), 'A')], (4, 6, 3), 'chebyshev'), [(4, 'A')])
+        self.assertAlmostEqual(calculate_distances([((1, 0), 'A')], (0, 2), 'cosine')[0][0], 1.0)
+        with self.assertRaises(ValueError):
+            calculate_distances(self.training_data, self.queries[0], 'hamming')
+
+class TestStreamingSelection(unittest.TestCase):
+    def setUp(self):
+        self.training_data = make_grid_data(seed=5)
+
+    def test_generator_matches_classify_point(self):
+        for k in (1, 4, 9, len(self.training_data)):
+            for q in [(0, 0), (3, 3), (2.5, 4.1), (7, -1)]:
+                rows = (row for row in self.training_data)
+                self.assertEqual(classify_point_streaming(rows, q, k), classify_point(self.training_data, q, k))
+
+    def test_neighbors_keep_stable_order_on_ties(self):
+        distances = calculate_distances(self.training_data, (3, 3))
+        distances.sort(key=lambda x: x[0])
+        self.assertEqual(k_nearest_neighbors(iter(self.training_data), (3, 3), 12), distances[:12])
+
+    def test_k_too_large(self):
+        with self.assertRaises(ValueError):
+            classify_point_streaming(iter(self.training_data[:3]), (0, 0), 4)
+
 if __name__ == '__main__':
     # This will run all the tests defined in the TestKnnFunctions class.
     # The output will clearly show which tests pass and which fail.
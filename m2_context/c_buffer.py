@@ -1,4 +1,22 @@
-from typing import List, Any, TypeVar
+import array
+import asyncio
+import math
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections import deque
+from typing import BinaryIO, Iterable, List, Any, Optional, TypeVar
+
+try:
+    import numpy as np
+except ImportError:  # Only TypedCircularBuffer's NumPy dtypes need it.
+    np = None
+
+# Set by benchmarks/instrument.py to count overwrites and time lock waits.
+_probe = None
 
 class CircularBuffer:
     """
@@ -7,8 +25,14 @@ class CircularBuffer:
     This class provides a FIFO (First-In-First-Out) data structure with a
     fixed capacity. When the buffer is full, new items overwrite the oldest
     items in the buffer.
+
+    Storage is a list preallocated to the full capacity, so adding an item
+    never allocates. The contents are tracked by the index of the oldest
+    item (``_head``) and the number of stored items (``_count``).
     """
 
+    __slots__ = ('_items', '_size', '_head', '_count')
+
     def __init__(self, size: int):
         """
         Initializes a CircularBuffer with a specified size.
@@ -19,7 +43,25 @@ class CircularBuffer:
         Raises:
             ValueError: If the size is not a positive integer.
         """
-        pass
+        if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+            raise ValueError("Buffer size must be a positive integer")
+        self._items: List[Any] = [None] * size
+        self._size = size
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of items currently in the buffer.
+        """
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        """
+        int: The maximum number of items the buffer can hold.
+        """
+        return self._size
 
     def is_full(self) -> bool:
         """
@@ -28,7 +70,7 @@ class CircularBuffer:
         Returns:
             bool: True if the buffer is at maximum capacity, False otherwise.
         """
-        pass
+        return self._count == self._size
 
     def is_empty(self) -> bool:
         """
@@ -37,7 +79,7 @@ class CircularBuffer:
         Returns:
             bool: True if the buffer contains no items, False otherwise.
         """
-        pass
+        return self._count == 0
 
     def add(self, item: any):
         """
@@ -48,7 +90,77 @@ class CircularBuffer:
         Args:
             item (any): The item to be added to the buffer.
         """
-        pass
+        size = self._size
+        if self._count == size:
+            # The slot after the newest item is the oldest one; overwrite it
+            # and advance the head past it.
+            if _probe is not None:
+                _probe.count('buffer.overwrites')
+            self._items[self._head] = item
+            self._head = (self._head + 1) % size
+        else:
+            self._items[(self._head + self._count) % size] = item
+            self._count += 1
+
+    def extend(self, items: Iterable[Any]):
+        """
+        Adds every item from an iterable, oldest first.
+
+        The result is the same as calling ``add`` for each item, but the items
+        are written with at most two slice assignments.
+
+        Args:
+            items (Iterable[any]): The items to be added to the buffer.
+        """
+        self._extend_collected(self._collect(items))
+
+    def _extend_collected(self, items):
+        # extend() for items that have already been through _collect.
+        size = self._size
+        n = len(items)
+        if _probe is not None and self._count + n > size:
+            _probe.count('buffer.overwrites', self._count + n - size)
+        if n >= size:
+            # Only the newest `size` items survive; lay them out from index 0.
+            self._items[:] = items[n - size:]
+            self._head = 0
+            self._count = size
+            return
+        start = (self._head + self._count) % size
+        first = min(n, size - start)
+        self._items[start:start + first] = items[:first]
+        self._items[:n - first] = items[first:]
+        total = self._count + n
+        if total > size:
+            self._head = (self._head + total - size) % size
+            total = size
+        self._count = total
+
+    def _collect(self, items: Iterable[Any]):
+        """
+        Materializes items for ``extend`` in a form that can be slice-assigned
+        into the storage.
+        """
+        return list(items)
+
+    def _take(self, n: int) -> list[any]:
+        # Removes the n oldest items with at most two slices, clearing the
+        # vacated slots so consumed items can be garbage collected.
+        n = max(0, min(n, self._count))
+        items = self._items
+        head = self._head
+        end = head + n
+        if end <= self._size:
+            taken = items[head:end]
+            items[head:end] = [None] * n
+        else:
+            end -= self._size
+            taken = items[head:] + items[:end]
+            items[head:] = [None] * (self._size - head)
+            items[:end] = [None] * end
+        self._head = end % self._size
+        self._count -= n
+        return taken
 
     def read(self) -> list[any]:
         """
@@ -58,4 +170,967 @@ class CircularBuffer:
             list[any]: A list of all items currently in the buffer, from oldest to newest.
                        Returns an empty list if the buffer is empty.
         """
-        pass
+        end = self._head + self._count
+        if end <= self._size:
+            return self._items[self._head:end]
+        # The contents wrap around the end of the storage list.
+        return self._items[self._head:] + self._items[:end - self._size]
+
+
+class TypedCircularBuffer(CircularBuffer):
+    """
+    A CircularBuffer of fixed-width numbers stored in one typed, contiguous
+    block of memory instead of a list of Python objects.
+
+    Storage is an ``array.array`` when ``typecode`` is one of
+    ``array.typecodes``, and a NumPy array for any other dtype. The contents
+    can be reached without copying through ``read_views``, written to a file
+    or socket with ``write_to``, and on Python 3.12+ exported through the
+    buffer protocol (e.g. ``memoryview(buffer)``).
+    """
+
+    __slots__ = ('typecode',)
+
+    def __init__(self, size: int, typecode: Any = 'd'):
+        """
+        Initializes a TypedCircularBuffer with a specified size and item type.
+
+        Args:
+            size (int): The maximum capacity of the buffer. Must be a positive integer.
+            typecode (str | numpy.dtype): An ``array`` typecode such as ``'d'`` or
+                ``'i'``, or any NumPy dtype.
+
+        Raises:
+            ValueError: If the size is not a positive integer or the typecode is
+                not supported.
+        """
+        super().__init__(size)
+        if isinstance(typecode, str) and typecode in array.typecodes:
+            storage = array.array(typecode, bytes(array.array(typecode).itemsize * size))
+        elif np is not None:
+            try:
+                dtype = np.dtype(typecode)
+            except TypeError as e:
+                raise ValueError(f"Unsupported typecode {typecode!r}") from e
+            storage = np.zeros(size, dtype=dtype)
+            typecode = dtype
+        else:
+            raise ValueError(f"Unsupported typecode {typecode!r}; NumPy dtypes require NumPy")
+        self._items = storage
+        self.typecode = typecode
+
+    def _collect(self, items: Iterable[Any]):
+        if isinstance(self._items, array.array):
+            if not isinstance(items, (list, tuple, array.array)):
+                items = list(items)
+            return array.array(self.typecode, items)
+        if not hasattr(items, '__len__'):
+            items = list(items)
+        return np.asarray(items, dtype=self.typecode)
+
+    def read_views(self) -> list:
+        """
+        Returns zero-copy views of the contents from oldest to newest.
+
+        Returns:
+            list: One view, or two when the contents wrap around the end of the
+                  storage. Views are ``memoryview`` slices for ``array`` storage
+                  and ndarray slices for NumPy storage. They alias the buffer and
+                  see later writes.
+        """
+        items = self._items
+        if isinstance(items, array.array):
+            items = memoryview(items)
+        end = self._head + self._count
+        if end <= self._size:
+            return [items[self._head:end]]
+        return [items[self._head:], items[:end - self._size]]
+
+    def read(self) -> list[any]:
+        return [item for view in self.read_views() for item in view.tolist()]
+
+    def write_to(self, stream: BinaryIO) -> int:
+        """
+        Writes the raw contents to a binary file or socket file object without
+        copying them first.
+
+        Args:
+            stream (BinaryIO): Any object with a ``write`` method accepting bytes-like data.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        written = 0
+        for view in self.read_views():
+            written += stream.write(view) or 0
+        return written
+
+    def __bytes__(self) -> bytes:
+        return b''.join(self.read_views())
+
+    def __buffer__(self, flags: int) -> memoryview:
+        # A buffer export must be contiguous, so wrapped contents are first
+        # rotated in place to start at index 0.
+        if self._head + self._count > self._size:
+            items = self._items
+            head = self._head
+            if isinstance(items, array.array):
+                items[:] = items[head:] + items[:head]
+            else:
+                items[:] = np.roll(items, -head)
+            self._head = 0
+        view = self.read_views()[0]
+        return memoryview(view)
+
+    def __release_buffer__(self, view: memoryview):
+        view.release()
+
+
+class LockedCircularBuffer(CircularBuffer):
+    """
+    A CircularBuffer that is safe to share between any number of producer and
+    consumer threads.
+
+    Every operation holds one lock, and consumers can take items out with a
+    blocking ``pop`` or a non-blocking ``drain``. ``overwrites`` counts the
+    items that were overwritten before anyone consumed them.
+    """
+
+    __slots__ = ('_lock', '_not_empty', 'overwrites')
+
+    def __init__(self, size: int):
+        """
+        Initializes a LockedCircularBuffer with a specified size.
+
+        Args:
+            size (int): The maximum capacity of the buffer. Must be a positive integer.
+
+        Raises:
+            ValueError: If the size is not a positive integer.
+        """
+        super().__init__(size)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self.overwrites = 0
+
+    def add(self, item: any):
+        with self._lock if _probe is None else _TimedLock(self._lock):
+            if self._count == self._size:
+                self.overwrites += 1
+            super().add(item)
+            self._not_empty.notify()
+
+    def extend(self, items: Iterable[Any]):
+        # Materialize outside the lock so slow iterables do not stall consumers.
+        items = self._collect(items)
+        with self._lock if _probe is None else _TimedLock(self._lock):
+            self.overwrites += max(0, self._count + len(items) - self._size)
+            self._extend_collected(items)
+            self._not_empty.notify_all()
+
+    def read(self) -> list[any]:
+        with self._lock if _probe is None else _TimedLock(self._lock):
+            return super().read()
+
+    def pop(self, timeout: Optional[float] = None) -> Any:
+        """
+        Removes and returns the oldest item, waiting for one if the buffer is empty.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Waits
+                forever when None.
+
+        Returns:
+            any: The oldest item in the buffer.
+
+        Raises:
+            queue.Empty: If no item arrived within the timeout.
+        """
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._count, timeout):
+                raise queue.Empty
+            return self._take(1)[0]
+
+    def drain(self, max_items: Optional[int] = None) -> list[any]:
+        """
+        Removes and returns up to max_items of the oldest items without waiting.
+
+        Args:
+            max_items (int, optional): The most items to remove. All items when None.
+
+        Returns:
+            list[any]: The removed items from oldest to newest. Empty if the
+                       buffer is empty.
+        """
+        with self._lock if _probe is None else _TimedLock(self._lock):
+            return self._take(self._count if max_items is None else max_items)
+
+
+class _TimedLock:
+    """
+    Holds a lock like ``with lock:``, reporting the time spent waiting to
+    ``_probe`` when the lock was already taken.
+    """
+
+    __slots__ = ('_lock',)
+
+    def __init__(self, lock):
+        self._lock = lock
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            start = time.perf_counter()
+            self._lock.acquire()
+            probe = _probe
+            if probe is not None:
+                probe.record('buffer.lock_wait', time.perf_counter() - start)
+        return self._lock
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+
+class SPSCCircularBuffer:
+    """
+    A lock-free CircularBuffer for exactly one producer thread and one
+    consumer thread.
+
+    The producer (``add``/``extend``) never blocks or takes a lock. Each slot
+    holds a ``(sequence, item)`` tuple that is stored and loaded as a single
+    reference, and the producer and consumer each own one ever-increasing
+    counter. When the producer laps the consumer the oldest items are
+    overwritten, as in CircularBuffer; the consumer notices the stale sequence
+    number and skips ahead to the oldest surviving item. Since there is no lock
+    to wait on, a blocking ``pop`` polls with a short exponential backoff.
+
+    ``overwrites`` counts the items the producer wrote over while the consumer
+    had not yet taken them.
+    """
+
+    __slots__ = ('_slots', '_size', '_write', '_read', 'overwrites')
+
+    # Longest sleep, in seconds, between polls of an empty buffer in pop.
+    max_backoff = 0.001
+
+    def __init__(self, size: int):
+        """
+        Initializes an SPSCCircularBuffer with a specified size.
+
+        Args:
+            size (int): The maximum capacity of the buffer. Must be a positive integer.
+
+        Raises:
+            ValueError: If the size is not a positive integer.
+        """
+        if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+            raise ValueError("Buffer size must be a positive integer")
+        self._slots: List[Any] = [(-1, None)] * size
+        self._size = size
+        self._write = 0  # Written only by the producer.
+        self._read = 0   # Written only by the consumer.
+        self.overwrites = 0
+
+    def __len__(self) -> int:
+        return min(self._write - self._read, self._size)
+
+    @property
+    def capacity(self) -> int:
+        return self._size
+
+    def is_full(self) -> bool:
+        return len(self) == self._size
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def add(self, item: any):
+        """
+        Adds an item, overwriting the oldest unconsumed item if the buffer is full.
+        Must only be called from the producer thread.
+        """
+        write = self._write
+        if write - self._read >= self._size:
+            self.overwrites += 1
+            if _probe is not None:
+                _probe.count('buffer.overwrites')
+        # Publish the slot before the counter so the consumer never sees a
+        # sequence number without its item.
+        self._slots[write % self._size] = (write, item)
+        self._write = write + 1
+
+    def extend(self, items: Iterable[Any]):
+        """
+        Adds every item from an iterable, oldest first. Producer thread only.
+        """
+        for item in items:
+            self.add(item)
+
+    def _poll(self):
+        read = self._read
+        while read < self._write:
+            seq, item = self._slots[read % self._size]
+            if seq == read:
+                self._read = read + 1
+                return True, item
+            # Lapped by the producer: jump to the oldest slot that survives.
+            read = max(read + 1, self._write - self._size)
+            self._read = read
+        return False, None
+
+    def pop(self, timeout: Optional[float] = None) -> Any:
+        """
+        Removes and returns the oldest item, waiting for one if the buffer is
+        empty. Must only be called from the consumer thread.
+
+        Raises:
+            queue.Empty: If no item arrived within the timeout.
+        """
+        found, item = self._poll()
+        if found:
+            return item
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 1e-6
+        while True:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise queue.Empty
+                delay = min(delay, remaining)
+            time.sleep(delay)
+            found, item = self._poll()
+            if found:
+                return item
+            delay = min(delay * 2, self.max_backoff)
+
+    def drain(self, max_items: Optional[int] = None) -> list[any]:
+        """
+        Removes and returns up to max_items of the oldest items without
+        waiting. Consumer thread only.
+        """
+        taken = []
+        while max_items is None or len(taken) < max_items:
+            found, item = self._poll()
+            if not found:
+                break
+            taken.append(item)
+        return taken
+
+    def read(self) -> list[any]:
+        """
+        Returns the unconsumed items from oldest to newest without removing
+        them. Items overwritten while reading are skipped.
+        """
+        write = self._write
+        items = []
+        for seq in range(max(self._read, write - self._size), write):
+            slot_seq, item = self._slots[seq % self._size]
+            if slot_seq == seq:
+                items.append(item)
+        return items
+
+
+class MappedCircularBuffer:
+    """
+    A CircularBuffer of fixed-size records kept in a memory-mapped file, so
+    the most recent items survive a crash or restart of the process.
+
+    The file starts with a small header (magic, record size, capacity, head
+    and count) followed by ``size`` record slots. Records are packed with a
+    ``struct`` format; formats with a single field store plain values and
+    formats with several fields store tuples. ``add`` writes the record and
+    then the header straight into the mapping, so it is O(1) with no system
+    calls; ``flush`` forces the pages to disk. A slot that is about to be
+    overwritten is first dropped from the header, so a crash between the
+    writes loses at most the oldest items and never reorders the rest.
+    Reopening an existing file restores its contents, and ``read`` returns
+    them in FIFO order.
+    """
+
+    _HEADER = struct.Struct('<4sIQQQ')
+    _MAGIC = b'CBUF'
+
+    def __init__(self, path: str, size: int, record_format: str = 'd'):
+        """
+        Opens or creates a MappedCircularBuffer backed by the file at path.
+
+        Args:
+            path (str): The backing file. Created if it does not exist.
+            size (int): The maximum capacity of the buffer. Must be a positive integer.
+            record_format (str): ``struct`` format of one record. Defaults to a
+                single double (``'d'``).
+
+        Raises:
+            ValueError: If the size is not a positive integer, or the existing
+                file is not a buffer with the same capacity and record size.
+        """
+        if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+            raise ValueError("Buffer size must be a positive integer")
+        self._record = struct.Struct(record_format)
+        self._size = size
+        self._single = len(self._record.unpack(bytes(self._record.size))) == 1
+        length = self._HEADER.size + size * self._record.size
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        try:
+            if exists:
+                if os.path.getsize(path) != length:
+                    raise ValueError(f"{path!r} does not hold a buffer of size {size} "
+                                     f"with {self._record.size}-byte records")
+            else:
+                self._file.truncate(length)
+            self._map = mmap.mmap(self._file.fileno(), length)
+        except Exception:
+            self._file.close()
+            raise
+
+        if exists:
+            magic, record_size, capacity, head, count = self._HEADER.unpack_from(self._map)
+            if (magic != self._MAGIC or capacity != size or record_size != self._record.size
+                    or head >= size or count > size):
+                self.close()
+                raise ValueError(f"{path!r} does not hold a buffer of size {size} "
+                                 f"with {self._record.size}-byte records")
+            self._head, self._count = head, count
+        else:
+            self._head = self._count = 0
+            self._write_header()
+
+    def _write_header(self):
+        self._HEADER.pack_into(self._map, 0, self._MAGIC, self._record.size, self._size, self._head, self._count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._size
+
+    def is_full(self) -> bool:
+        return self._count == self._size
+
+    def is_empty(self) -> bool:
+        return self._count == 0
+
+    def _pack(self, item: Any) -> bytes:
+        return self._record.pack(item) if self._single else self._record.pack(*item)
+
+    def add(self, item: any):
+        """
+        Adds an item, overwriting the oldest one if the buffer is full.
+        """
+        record = self._pack(item)
+        size = self._size
+        if self._count == size:
+            if _probe is not None:
+                _probe.count('buffer.overwrites')
+            # The slot to reuse still holds the oldest visible record; retire it
+            # before writing over it.
+            self._head = (self._head + 1) % size
+            self._count -= 1
+            self._write_header()
+        slot = (self._head + self._count) % size
+        offset = self._HEADER.size + slot * self._record.size
+        # Write the record before the header that makes it visible.
+        self._map[offset:offset + self._record.size] = record
+        self._count += 1
+        self._write_header()
+
+    def extend(self, items: Iterable[Any]):
+        """
+        Adds every item from an iterable, oldest first, with at most two
+        writes into the mapping.
+        """
+        records = [self._pack(item) for item in items]
+        size = self._size
+        n = len(records)
+        excess = self._count + n - size
+        if excess > 0:
+            if _probe is not None:
+                _probe.count('buffer.overwrites', excess)
+            # Retire every visible slot the new records will land on first.
+            if n >= size:
+                records = records[n - size:]
+                n = size
+                self._head = self._count = 0
+            else:
+                self._head = (self._head + excess) % size
+                self._count -= excess
+            self._write_header()
+        start = (self._head + self._count) % size
+        first = min(n, size - start)
+        base = self._HEADER.size
+        record_size = self._record.size
+        self._map[base + start * record_size:base + (start + first) * record_size] = b''.join(records[:first])
+        self._map[base:base + (n - first) * record_size] = b''.join(records[first:])
+        self._count += n
+        self._write_header()
+
+    def read(self) -> list[any]:
+        """
+        Retrieves all items from the buffer in FIFO order.
+        """
+        base = self._HEADER.size
+        record_size = self._record.size
+        end = self._head + self._count
+        if end <= self._size:
+            data = self._map[base + self._head * record_size:base + end * record_size]
+        else:
+            data = (self._map[base + self._head * record_size:base + self._size * record_size] +
+                    self._map[base:base + (end - self._size) * record_size])
+        records = self._record.iter_unpack(data)
+        if self._single:
+            return [record[0] for record in records]
+        return list(records)
+
+    def flush(self):
+        """
+        Writes modified pages back to the file (``msync``).
+        """
+        self._map.flush()
+
+    def close(self):
+        """
+        Flushes and unmaps the file. The buffer cannot be used afterwards.
+        """
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'MappedCircularBuffer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncCircularBuffer(CircularBuffer):
+    """
+    A CircularBuffer for asyncio code, with awaitable consumers instead of
+    polling ``is_empty``/``read``.
+
+    Consumers use ``await get()``, ``await get_batch(n, timeout)`` or
+    ``async for item in buffer`` (which runs until the task is cancelled).
+    ``overflow`` decides what happens when an item arrives at a full buffer:
+
+    * ``'overwrite'``: overwrite the oldest item, as CircularBuffer does.
+    * ``'drop'``: discard the new item.
+    * ``'wait'``: ``await put(item)`` waits for space; the non-waiting
+      ``add``/``extend`` raise ``asyncio.QueueFull`` instead.
+
+    The ``overwrites`` and ``dropped`` counters record lost items. Waiter
+    futures are only created when a coroutine actually has to wait, never
+    when items or space are already available. Like ``asyncio.Queue``, the
+    buffer must only be used from one event loop thread.
+    """
+
+    __slots__ = ('overflow', 'overwrites', 'dropped', '_getters', '_putters')
+
+    OVERFLOW_POLICIES = ('overwrite', 'drop', 'wait')
+
+    def __init__(self, size: int, overflow: str = 'overwrite'):
+        """
+        Initializes an AsyncCircularBuffer with a specified size and overflow policy.
+
+        Args:
+            size (int): The maximum capacity of the buffer. Must be a positive integer.
+            overflow (str): One of ``'overwrite'``, ``'drop'`` or ``'wait'``.
+
+        Raises:
+            ValueError: If the size is not a positive integer or the policy is unknown.
+        """
+        super().__init__(size)
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(self.OVERFLOW_POLICIES)}")
+        self.overflow = overflow
+        self.overwrites = 0
+        self.dropped = 0
+        self._getters = deque()  # (items needed, future) pairs.
+        self._putters = deque()
+
+    def add(self, item: any):
+        if self._count == self._size:
+            if self.overflow == 'drop':
+                self.dropped += 1
+                return
+            if self.overflow == 'wait':
+                raise asyncio.QueueFull
+            self.overwrites += 1
+        super().add(item)
+        if self._getters:
+            self._wake_getters()
+
+    def extend(self, items: Iterable[Any]):
+        items = self._collect(items)
+        excess = self._count + len(items) - self._size
+        if excess > 0:
+            if self.overflow == 'wait':
+                raise asyncio.QueueFull
+            if self.overflow == 'drop':
+                self.dropped += excess
+                items = items[:len(items) - excess]
+            else:
+                self.overwrites += excess
+        self._extend_collected(items)
+        if self._getters:
+            self._wake_getters()
+
+    async def put(self, item: Any):
+        """
+        Adds an item, waiting for space first under the ``'wait'`` policy.
+        """
+        if self.overflow == 'wait':
+            loop = asyncio.get_running_loop()
+            while self._count == self._size:
+                future = loop.create_future()
+                self._putters.append(future)
+                try:
+                    await future
+                except asyncio.CancelledError:
+                    future.cancel()
+                    try:
+                        self._putters.remove(future)
+                    except ValueError:
+                        pass
+                    if not future.cancelled():
+                        # We were woken for a free slot we will not use; hand it on.
+                        self._wake_putters()
+                    raise
+        self.add(item)
+
+    async def get(self) -> Any:
+        """
+        Removes and returns the oldest item, waiting for one if the buffer is empty.
+        """
+        if not self._count:
+            await self._wait_for(1)
+        return self._take(1)[0]
+
+    async def get_batch(self, n: int, timeout: Optional[float] = None) -> list[any]:
+        """
+        Removes and returns up to n of the oldest items.
+
+        Waits until n items (or a full buffer's worth, if n is larger than the
+        capacity) are available, or until timeout seconds have passed, and then
+        returns whatever is there. The result may be empty after a timeout.
+        """
+        if n <= 0:
+            return []
+        if self._count < min(n, self._size):
+            try:
+                await self._wait_for(min(n, self._size), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._take(n)
+
+    def __aiter__(self) -> 'AsyncCircularBuffer':
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self.get()
+
+    async def _wait_for(self, needed: int, timeout: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        # Another consumer may take the items between our wake-up and resumption.
+        while self._count < needed:
+            future = loop.create_future()
+            self._getters.append((needed, future))
+            if deadline is None:
+                await future
+            else:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                await asyncio.wait_for(future, remaining)
+
+    def _wake_getters(self):
+        # Only wake consumers whose threshold is met, so a batch consumer is
+        # not woken (and does not allocate a new future) for every item.
+        waiting = deque()
+        for needed, future in self._getters:
+            if future.done():
+                continue
+            if needed <= self._count:
+                future.set_result(None)
+            else:
+                waiting.append((needed, future))
+        self._getters = waiting
+
+    def _take(self, n: int) -> list[any]:
+        taken = super()._take(n)
+        self._wake_putters()
+        return taken
+
+    def _wake_putters(self):
+        free = self._size - self._count
+        while free and self._putters:
+            future = self._putters.popleft()
+            if not future.done():
+                future.set_result(None)
+                free -= 1
+
+
+class MeanVariance:
+    """
+    Running mean and variance of a window from a sum and sum of squares.
+
+    Values are shifted by an anchor from the window before accumulating, which
+    keeps the sums small and avoids most of the cancellation that a plain
+    sum of squares suffers from. Once per window of removals, and at once
+    when the sums have lost precision, ``stale`` is set; the owning
+    WindowedCircularBuffer then calls ``rebuild`` with the window's values,
+    which re-anchors on the newest one. So an early outlier cannot spoil the
+    result after it has left, and no second copy of the window is kept.
+    """
+
+    __slots__ = ('count', 'stale', '_shift', '_sum', '_sum_sq', '_removed')
+
+    def __init__(self):
+        self.count = 0
+        self.stale = False
+        self._shift = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._removed = 0
+
+    def add(self, value: float, seq: int):
+        if self._shift is None:
+            self._shift = value
+        d = value - self._shift
+        self.count += 1
+        self._sum += d
+        self._sum_sq += d * d
+
+    def remove(self, value: float, seq: int):
+        d = value - self._shift
+        self.count -= 1
+        self._sum -= d
+        self._sum_sq -= d * d
+        self._removed += 1
+        if not self.count:
+            self._shift = None
+            self._sum = self._sum_sq = 0.0
+            self._removed = 0
+        elif (self._removed >= self.count or d * d > self._sum_sq
+              or self._sum * self._sum > self.count * self._sum_sq * (1 - 1e-6)):
+            # Periodically, after a removal that dominated the sums, or once the
+            # anchor is so far from the window that cancellation would eat six
+            # or more digits of the variance.
+            self.stale = True
+
+    def rebuild(self, values: List[float]):
+        """
+        Recomputes the sums exactly from the window's values, oldest first.
+        """
+        self.count = len(values)
+        self.stale = False
+        self._removed = 0
+        if not values:
+            self._shift = None
+            self._sum = self._sum_sq = 0.0
+            return
+        shift = self._shift = values[-1]
+        self._sum = math.fsum(v - shift for v in values)
+        self._sum_sq = math.fsum((v - shift) * (v - shift) for v in values)
+
+    @property
+    def mean(self) -> float:
+        if not self.count:
+            raise ValueError("mean of an empty window")
+        return self._shift + self._sum / self.count
+
+    def variance(self, ddof: int = 0) -> float:
+        """
+        Returns the variance of the window; ddof=1 gives the sample variance.
+        """
+        if self.count - ddof <= 0:
+            raise ValueError("variance needs more values than ddof")
+        centered = self._sum_sq - self._sum * self._sum / self.count
+        return max(centered, 0.0) / (self.count - ddof)
+
+
+class MinMax:
+    """
+    Window minimum and maximum from two monotonic deques of (seq, value).
+
+    Each value is pushed and popped at most once per deque, so updates are
+    O(1) amortized and queries are O(1).
+    """
+
+    __slots__ = ('_min', '_max')
+
+    def __init__(self):
+        self._min = deque()
+        self._max = deque()
+
+    def add(self, value: Any, seq: int):
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
+    def remove(self, value: Any, seq: int):
+        if self._min and self._min[0][0] == seq:
+            self._min.popleft()
+        if self._max and self._max[0][0] == seq:
+            self._max.popleft()
+
+    @property
+    def min(self) -> Any:
+        if not self._min:
+            raise ValueError("min of an empty window")
+        return self._min[0][1]
+
+    @property
+    def max(self) -> Any:
+        if not self._max:
+            raise ValueError("max of an empty window")
+        return self._max[0][1]
+
+
+class QuantileSketch:
+    """
+    Approximate window quantiles from logarithmically spaced buckets.
+
+    Values are counted in buckets whose bounds grow by a factor
+    gamma = (1 + a) / (1 - a), so any returned quantile is within a relative
+    error ``a`` (``relative_accuracy``) of a true value from the window.
+    Unlike most sketches, a bucket count can simply be decremented, which is
+    what lets the window drop its oldest value in O(1). Queries walk the
+    occupied buckets in order.
+    """
+
+    __slots__ = ('relative_accuracy', 'count', '_log_gamma', '_positive', '_negative', '_zeros')
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.count = 0
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self._positive = {}
+        self._negative = {}
+        self._zeros = 0
+
+    def _bucket(self, value: float) -> int:
+        return math.ceil(math.log(abs(value)) / self._log_gamma)
+
+    def _update(self, value: float, delta: int):
+        self.count += delta
+        if value == 0:
+            self._zeros += delta
+            return
+        counts = self._positive if value > 0 else self._negative
+        key = self._bucket(value)
+        remaining = counts.get(key, 0) + delta
+        if remaining:
+            counts[key] = remaining
+        else:
+            del counts[key]
+
+    def check(self, value: float):
+        if not math.isfinite(value):
+            raise ValueError("QuantileSketch only accepts finite values")
+
+    def add(self, value: float, seq: int):
+        self._update(value, 1)
+
+    def remove(self, value: float, seq: int):
+        self._update(value, -1)
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns an estimate of the q-quantile (0 <= q <= 1) of the window.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            raise ValueError("quantile of an empty window")
+        rank = q * (self.count - 1)
+        gamma = math.exp(self._log_gamma)
+        # Buckets from the most negative value up to the most positive one.
+        buckets = [(-key, -1, n) for key, n in self._negative.items()]
+        buckets.sort()
+        buckets.append((0, 0, self._zeros))
+        buckets.extend(sorted((key, 1, n) for key, n in self._positive.items()))
+        seen = 0
+        for key, sign, n in buckets:
+            seen += n
+            if seen > rank:
+                if sign == 0:
+                    return 0.0
+                key = key if sign > 0 else -key
+                # The midpoint of the bucket (gamma^(key-1), gamma^key] in relative terms.
+                return sign * 2 * gamma ** key / (gamma + 1)
+
+
+class WindowedCircularBuffer(CircularBuffer):
+    """
+    A CircularBuffer that keeps incremental aggregates of its contents.
+
+    Each aggregator (``MeanVariance``, ``MinMax``, ``QuantileSketch`` or any
+    object with ``add(value, seq)`` and ``remove(value, seq)``) is told about
+    every item that enters the window and every item that an ``add``
+    overwrites, with ``seq`` numbering the items in arrival order. Queries on
+    the aggregators then cost O(1) (or O(buckets) for quantiles) instead of
+    a pass over ``read()``.
+
+    Aggregators may also define ``check(value)``, which is called for every
+    aggregator before anything changes so a rejected item leaves the buffer
+    and all aggregators as they were, and a ``stale`` flag, after which
+    ``rebuild(values)`` is called with the window's contents. Aggregators
+    added once items have arrived must go through ``attach``.
+    """
+
+    __slots__ = ('aggregators', '_seq')
+
+    def __init__(self, size: int, aggregators: Iterable[Any] = ()):
+        """
+        Initializes a WindowedCircularBuffer with a specified size and aggregators.
+
+        Args:
+            size (int): The maximum capacity of the buffer. Must be a positive integer.
+            aggregators (Iterable): The aggregators to keep up to date.
+
+        Raises:
+            ValueError: If the size is not a positive integer.
+        """
+        super().__init__(size)
+        self.aggregators = list(aggregators)
+        self._seq = 0
+
+    def attach(self, aggregator: Any):
+        """
+        Starts keeping aggregator up to date, first feeding it the items
+        already in the window.
+        """
+        first = self._seq - self._count
+        for offset, item in enumerate(self.read()):
+            aggregator.add(item, first + offset)
+        self.aggregators.append(aggregator)
+
+    def add(self, item: any):
+        aggregators = self.aggregators
+        for aggregator in aggregators:
+            check = getattr(aggregator, 'check', None)
+            if check is not None:
+                check(item)
+        if self._count == self._size:
+            evicted = self._items[self._head]
+            for aggregator in aggregators:
+                aggregator.remove(evicted, self._seq - self._size)
+        super().add(item)
+        for aggregator in aggregators:
+            aggregator.add(item, self._seq)
+        self._seq += 1
+        for aggregator in aggregators:
+            if getattr(aggregator, 'stale', False):
+                aggregator.rebuild(self.read())
+
+    def extend(self, items: Iterable[Any]):
+        for item in items:
+            self.add(item)
@@ -3,8 +3,19 @@
 # NOTE: Run this file directly. python m2_context/test_circular_buffer.py 
 # It's set up this way to be able to be run a little easier in context of the tutorial.
 
+import asyncio
+import io
+import os
+import queue
+import random
+import statistics
+import sys
+import tempfile
+import threading
 import unittest
-from c_buffer import CircularBuffer
+from c_buffer import CircularBuffer, TypedCircularBuffer, LockedCircularBuffer, SPSCCircularBuffer, np
+from c_buffer import MappedCircularBuffer, AsyncCircularBuffer
+from c_buffer import WindowedCircularBuffer, MeanVariance, MinMax, QuantileSketch
 
 
 class TestCircularBuffer(unittest.TestCase):
@@ -88,6 +99,383 @@ class TestCircularBuffer(unittest.TestCase):
         self.assertTrue(buffer.is_full())
         self.assertEqual(buffer.read(), [200])
 
+    def test_extend_matches_repeated_add(self):
+        """Tests that extend gives the same contents as adding items one by one."""
+        for size in (1, 3, 5):
+            for start in range(0, 7):
+                for n in range(0, 12):
+                    expected = CircularBuffer(size)
+                    buffer = CircularBuffer(size)
+                    for i in range(start):
+                        expected.add(i)
+                        buffer.add(i)
+                    for i in range(n):
+                        expected.add(100 + i)
+                    buffer.extend(100 + i for i in range(n))
+                    self.assertEqual(buffer.read(), expected.read())
+                    self.assertEqual(len(buffer), len(expected))
+
+    def test_slots(self):
+        """Tests that instances carry no per-instance __dict__."""
+        with self.assertRaises(AttributeError):
+            CircularBuffer(2).extra = 1
+
+
+class TestTypedCircularBuffer(unittest.TestCase):
+    """Tests for the typed, contiguous variant of the buffer."""
+
+    def typecodes(self):
+        yield 'd'
+        yield 'i'
+        if np is not None:
+            yield np.float32
+
+    def test_matches_circular_buffer(self):
+        """Tests that the typed buffer holds the same items as the list-backed one."""
+        for typecode in self.typecodes():
+            expected = CircularBuffer(4)
+            buffer = TypedCircularBuffer(4, typecode)
+            for i in range(7):
+                expected.add(i)
+                buffer.add(i)
+                self.assertEqual(buffer.read(), expected.read())
+            expected.extend(range(10, 13))
+            buffer.extend(range(10, 13))
+            self.assertEqual(buffer.read(), expected.read())
+            self.assertTrue(buffer.is_full())
+
+    def test_read_views_are_zero_copy(self):
+        """Tests that the views alias the storage and split at the wrap point."""
+        buffer = TypedCircularBuffer(4, 'd')
+        buffer.extend([1.0, 2.0, 3.0, 4.0])
+        buffer.add(5.0)
+        views = buffer.read_views()
+        self.assertEqual([v.tolist() for v in views], [[2.0, 3.0, 4.0], [5.0]])
+        buffer.add(6.0)  # Overwrites 2.0 in place.
+        self.assertEqual(views[0].tolist(), [6.0, 3.0, 4.0])
+
+    def test_write_to_and_bytes(self):
+        """Tests that the raw contents can be written straight to a stream."""
+        buffer = TypedCircularBuffer(3, 'i')
+        buffer.extend([1, 2, 3, 4])
+        stream = io.BytesIO()
+        self.assertEqual(buffer.write_to(stream), 3 * buffer.read_views()[0].itemsize)
+        self.assertEqual(stream.getvalue(), bytes(buffer))
+        self.assertEqual(memoryview(stream.getvalue()).cast('i').tolist(), [2, 3, 4])
+
+    @unittest.skipIf(sys.version_info < (3, 12), "The buffer protocol for classes needs Python 3.12")
+    def test_buffer_protocol(self):
+        """Tests that a wrapped buffer exports its contents in FIFO order."""
+        buffer = TypedCircularBuffer(3, 'd')
+        buffer.extend([1.0, 2.0, 3.0, 4.0])
+        with memoryview(buffer) as view:
+            self.assertEqual(view.tolist(), [2.0, 3.0, 4.0])
+
+    def test_invalid_typecode(self):
+        """Tests that unknown typecodes are rejected."""
+        with self.assertRaises(ValueError):
+            TypedCircularBuffer(3, 'not-a-type')
+
+
+class TestConcurrentCircularBuffers(unittest.TestCase):
+    """Tests shared by the locked and the single-producer/single-consumer buffers."""
+
+    classes = (LockedCircularBuffer, SPSCCircularBuffer)
+
+    def test_single_thread_semantics(self):
+        """Tests that both variants keep CircularBuffer's overwrite behaviour."""
+        for cls in self.classes:
+            buffer = cls(3)
+            buffer.extend([1, 2, 3, 4])
+            buffer.add(5)
+            self.assertEqual(buffer.read(), [3, 4, 5])
+            self.assertEqual(buffer.overwrites, 2)
+            self.assertTrue(buffer.is_full())
+            self.assertEqual(buffer.pop(), 3)
+            self.assertEqual(buffer.drain(1), [4])
+            self.assertEqual(buffer.drain(), [5])
+            self.assertTrue(buffer.is_empty())
+
+    def test_pop_timeout(self):
+        """Tests that pop gives up with queue.Empty after the timeout."""
+        for cls in self.classes:
+            with self.assertRaises(queue.Empty):
+                cls(2).pop(timeout=0.01)
+
+    def test_producer_consumer_threads(self):
+        """Tests that a consumer thread receives every item in order."""
+        for cls in self.classes:
+            buffer = cls(10000)
+            received = []
+
+            def consume():
+                for _ in range(5000):
+                    received.append(buffer.pop(timeout=5))
+
+            consumer = threading.Thread(target=consume)
+            consumer.start()
+            for i in range(5000):
+                buffer.add(i)
+            consumer.join()
+            self.assertEqual(received, list(range(5000)))
+            self.assertEqual(buffer.overwrites, 0)
+
+    def test_spsc_consumer_skips_overwritten_items(self):
+        """Tests that a lapped consumer resumes at the oldest surviving item."""
+        buffer = SPSCCircularBuffer(4)
+        buffer.extend(range(3))
+        self.assertEqual(buffer.pop(), 0)
+        buffer.extend(range(3, 10))
+        self.assertEqual(buffer.drain(), [6, 7, 8, 9])
+        self.assertEqual(buffer.overwrites, 5)
+
+    def test_locked_extend_collects_once(self):
+        """Tests that extend materializes the items only once, before taking the lock."""
+        calls = []
+
+        class Counting(LockedCircularBuffer):
+            def _collect(self, items):
+                calls.append(self._lock.locked())
+                return super()._collect(items)
+
+        buffer = Counting(3)
+        buffer.extend(iter(range(5)))
+        self.assertEqual(buffer.read(), [2, 3, 4])
+        self.assertEqual(calls, [False])
+
+
+class TestMappedCircularBuffer(unittest.TestCase):
+    """Tests for the memory-mapped, persistent buffer."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'events.buf')
+
+    def test_matches_circular_buffer(self):
+        """Tests that add and extend behave like the in-memory buffer."""
+        expected = CircularBuffer(4)
+        with MappedCircularBuffer(self.path, 4) as buffer:
+            self.assertEqual(buffer.read(), [])
+            for i in range(6):
+                expected.add(float(i))
+                buffer.add(i)
+                self.assertEqual(buffer.read(), expected.read())
+            for n in (0, 2, 5):
+                expected.extend(float(i) for i in range(n))
+                buffer.extend(range(n))
+                self.assertEqual(buffer.read(), expected.read())
+
+    def test_contents_survive_reopening(self):
+        """Tests that a reopened buffer returns the surviving items in FIFO order."""
+        buffer = MappedCircularBuffer(self.path, 3, record_format='<qd')
+        buffer.extend((i, i / 2) for i in range(5))
+        del buffer  # No close: the data must already be in the mapping.
+        with MappedCircularBuffer(self.path, 3, record_format='<qd') as buffer:
+            self.assertEqual(buffer.read(), [(2, 1.0), (3, 1.5), (4, 2.0)])
+            self.assertTrue(buffer.is_full())
+
+    def test_crash_between_writes_keeps_fifo_order(self):
+        """Tests that the file is in FIFO order around every header write of add and extend."""
+        snapshots = []
+
+        class Recording(MappedCircularBuffer):
+            def _write_header(self):
+                snapshots.append(bytes(self._map))
+                super()._write_header()
+                snapshots.append(bytes(self._map))
+
+        with Recording(self.path, 3) as buffer:
+            buffer.extend(range(3))
+            del snapshots[:]
+            buffer.add(3)
+            buffer.extend(range(4, 6))
+            buffer.extend(range(6, 11))
+        crashed = os.path.join(os.path.dirname(self.path), 'crashed.buf')
+        for snapshot in snapshots:
+            with open(crashed, 'wb') as handle:
+                handle.write(snapshot)
+            with MappedCircularBuffer(crashed, 3) as buffer:
+                items = buffer.read()
+            first = int(items[0]) if items else 0
+            self.assertEqual(items, [float(i) for i in range(first, first + len(items))])
+
+    def test_reopen_with_corrupt_header(self):
+        """Tests that a header whose head or count does not fit the capacity is rejected."""
+        with MappedCircularBuffer(self.path, 3) as buffer:
+            buffer.extend(range(3))
+        header = MappedCircularBuffer._HEADER
+        for head, count in ((3, 1), (0, 4)):
+            with open(self.path, 'r+b') as handle:
+                fields = list(header.unpack(handle.read(header.size)))
+                fields[3:] = head, count
+                handle.seek(0)
+                handle.write(header.pack(*fields))
+            with self.assertRaises(ValueError):
+                MappedCircularBuffer(self.path, 3)
+
+    def test_reopen_with_different_shape(self):
+        """Tests that an existing file with another capacity is rejected."""
+        MappedCircularBuffer(self.path, 3).close()
+        with self.assertRaises(ValueError):
+            MappedCircularBuffer(self.path, 4)
+
+
+class TestAsyncCircularBuffer(unittest.IsolatedAsyncioTestCase):
+    """Tests for the asyncio buffer and its overflow policies."""
+
+    async def test_get_waits_for_producer(self):
+        """Tests that get suspends until an item is added."""
+        buffer = AsyncCircularBuffer(3)
+        consumer = asyncio.ensure_future(buffer.get())
+        await asyncio.sleep(0)
+        self.assertFalse(consumer.done())
+        buffer.add('x')
+        self.assertEqual(await consumer, 'x')
+
+    async def test_get_batch(self):
+        """Tests that get_batch waits for n items, or returns what it has at the timeout."""
+        buffer = AsyncCircularBuffer(5)
+        batch = asyncio.ensure_future(buffer.get_batch(3))
+        buffer.add(1)
+        buffer.add(2)
+        await asyncio.sleep(0)
+        self.assertFalse(batch.done())
+        buffer.extend([3, 4])
+        self.assertEqual(await batch, [1, 2, 3])
+        self.assertEqual(await buffer.get_batch(3, timeout=0.01), [4])
+        self.assertEqual(await buffer.get_batch(3, timeout=0.01), [])
+
+    async def test_async_iteration(self):
+        """Tests that async for yields items in FIFO order."""
+        buffer = AsyncCircularBuffer(4)
+        buffer.extend(range(3))
+        received = []
+        async for item in buffer:
+            received.append(item)
+            if len(received) == 3:
+                break
+        self.assertEqual(received, [0, 1, 2])
+
+    async def test_overflow_policies(self):
+        """Tests overwrite-oldest, drop-newest and wait-for-space."""
+        overwrite = AsyncCircularBuffer(2)
+        overwrite.extend([1, 2, 3])
+        self.assertEqual((overwrite.read(), overwrite.overwrites), ([2, 3], 1))
+
+        drop = AsyncCircularBuffer(2, overflow='drop')
+        drop.extend([1, 2, 3])
+        drop.add(4)
+        self.assertEqual((drop.read(), drop.dropped), ([1, 2], 2))
+
+        wait = AsyncCircularBuffer(2, overflow='wait')
+        wait.extend([1, 2])
+        with self.assertRaises(asyncio.QueueFull):
+            wait.add(3)
+        producer = asyncio.ensure_future(wait.put(3))
+        await asyncio.sleep(0)
+        self.assertFalse(producer.done())
+        self.assertEqual(await wait.get(), 1)
+        await producer
+        self.assertEqual(wait.read(), [2, 3])
+
+    async def test_cancelled_putter_passes_on_its_wakeup(self):
+        """Tests that a put cancelled after being woken lets the next waiting put run."""
+        buffer = AsyncCircularBuffer(1, overflow='wait')
+        buffer.add(0)
+        first = asyncio.ensure_future(buffer.put(1))
+        second = asyncio.ensure_future(buffer.put(2))
+        await asyncio.sleep(0)
+        self.assertEqual(await buffer.get(), 0)
+        first.cancel()
+        await asyncio.wait_for(second, 1)
+        self.assertTrue(first.cancelled())
+        self.assertEqual(buffer.read(), [2])
+
+    def test_invalid_policy(self):
+        """Tests that unknown overflow policies are rejected."""
+        with self.assertRaises(ValueError):
+            AsyncCircularBuffer(2, overflow='block')
+
+
+class TestWindowedCircularBuffer(unittest.TestCase):
+    """Tests that the incremental aggregates track the window contents."""
+
+    def test_aggregates_match_window(self):
+        """Tests mean, variance, min, max and quantiles against read()."""
+        rng = random.Random(0)
+        moments, extremes, sketch = MeanVariance(), MinMax(), QuantileSketch(0.01)
+        buffer = WindowedCircularBuffer(50, [moments, extremes, sketch])
+        for step in range(500):
+            buffer.add(rng.uniform(-100, 1000) if step % 7 else 0.0)
+            window = buffer.read()
+            self.assertAlmostEqual(moments.mean, statistics.fmean(window), places=6)
+            self.assertEqual(extremes.min, min(window))
+            self.assertEqual(extremes.max, max(window))
+            if len(window) > 1:
+                self.assertAlmostEqual(moments.variance(ddof=1), statistics.variance(window), places=4)
+        window = sorted(buffer.read())
+        for q in (0.0, 0.25, 0.5, 0.9, 1.0):
+            true_value = window[int(q * (len(window) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - true_value), 0.01 * abs(true_value) + 1e-12)
+
+    def test_variance_recovers_from_outlier(self):
+        """Tests that a large first value stops affecting the variance once it leaves the window."""
+        rng = random.Random(5)
+        moments = MeanVariance()
+        buffer = WindowedCircularBuffer(100, [moments])
+        buffer.add(1e9)
+        for step in range(3000):
+            buffer.add(rng.gauss(0, 1))
+            if step >= 100 and step % 50 == 0:
+                window = buffer.read()
+                self.assertAlmostEqual(moments.mean, statistics.fmean(window), places=9)
+                self.assertAlmostEqual(moments.variance(ddof=1), statistics.variance(window), places=9)
+
+    def test_extend_updates_aggregates(self):
+        """Tests that extend evicts overwritten items from the aggregates."""
+        extremes = MinMax()
+        buffer = WindowedCircularBuffer(3, [extremes])
+        buffer.extend([9, 1, 5, 7, 6])
+        self.assertEqual(buffer.read(), [5, 7, 6])
+        self.assertEqual((extremes.min, extremes.max), (5, 7))
+
+    def test_attach_replays_window(self):
+        """Tests that an aggregator attached after items arrived sees the whole window."""
+        buffer = WindowedCircularBuffer(4, [])
+        buffer.extend([3.0, 8.0, 1.0, 6.0, 2.0])
+        moments, extremes = MeanVariance(), MinMax()
+        buffer.attach(moments)
+        buffer.attach(extremes)
+        buffer.extend([7.0, 4.0])
+        window = buffer.read()
+        self.assertEqual(moments.count, 4)
+        self.assertAlmostEqual(moments.mean, statistics.fmean(window))
+        self.assertAlmostEqual(moments.variance(ddof=1), statistics.variance(window))
+        self.assertEqual((extremes.min, extremes.max), (min(window), max(window)))
+
+    def test_rejected_item_changes_nothing(self):
+        """Tests that a value an aggregator rejects leaves the buffer and every aggregator unchanged."""
+        moments, extremes, sketch = MeanVariance(), MinMax(), QuantileSketch()
+        buffer = WindowedCircularBuffer(3, [moments, extremes, sketch])
+        buffer.extend([1.0, 2.0, 3.0])
+        for bad in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                buffer.add(bad)
+        self.assertEqual(buffer.read(), [1.0, 2.0, 3.0])
+        self.assertEqual((moments.count, moments.mean), (3, 2.0))
+        self.assertEqual((extremes.min, extremes.max), (1.0, 3.0))
+        self.assertEqual(sketch.count, 3)
+        buffer.add(4.0)
+        self.assertEqual((moments.mean, extremes.min, extremes.max), (3.0, 2.0, 4.0))
+
+    def test_empty_window(self):
+        """Tests that queries on an empty window raise ValueError."""
+        with self.assertRaises(ValueError):
+            MeanVariance().mean
+        with self.assertRaises(ValueError):
+            QuantileSketch().quantile(0.5)
+
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
 
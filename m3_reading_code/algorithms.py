@@ -1,26 +1,36 @@
+import math
+from collections import OrderedDict, namedtuple
 from typing import Literal
 import numpy as np
-from scipy.linalg import solve, solve_banded
+from numpy.linalg import LinAlgError
+from scipy.linalg import get_lapack_funcs, solve
 from . import PPoly
 from ._polyint import _isscalar
 
 __all__ = ["base_alg", "alg2", "apply_alg2", "alg1"]
 
-def prep_data(x, y, axis, dydx=None):
+_probe = None
+
+def prep_data(x, y, axis, dydx=None, check_finite=True, assume_sorted=False, dtype=None):
+    if _probe is not None:
+        start = _probe.clock()
     x, y = map(np.asarray, (x, y))
     if np.issubdtype(x.dtype, np.complexfloating):
         raise ValueError("`x` must contain real values.")
     x = x.astype(float)
+    real = np.dtype(float if dtype is None else dtype)
+    if real.kind != 'f':
+        raise ValueError("`dtype` must be a real floating point type.")
     if np.issubdtype(y.dtype, np.complexfloating):
-        dtype = complex
+        dtype = np.result_type(real, np.complex64)
     else:
-        dtype = float
+        dtype = real
     if dydx is not None:
         dydx = np.asarray(dydx)
         if y.shape != dydx.shape:
             raise ValueError("The shapes of `y` and `dydx` must be identical.")
         if np.issubdtype(dydx.dtype, np.complexfloating):
-            dtype = complex
+            dtype = np.result_type(real, np.complex64)
         dydx = dydx.astype(dtype, copy=False)
     y = y.astype(dtype, copy=False)
     axis = axis % y.ndim
@@ -31,48 +41,376 @@ def prep_data(x, y, axis, dydx=None):
     if x.shape[0] != y.shape[axis]:
         raise ValueError(f"The length of `y` along `axis`={axis} doesn't "
                          "match the length of `x`")
-    if not np.all(np.isfinite(x)):
-        raise ValueError("`x` must contain only finite values.")
-    if not np.all(np.isfinite(y)):
-        raise ValueError("`y` must contain only finite values.")
-    if dydx is not None and not np.all(np.isfinite(dydx)):
-        raise ValueError("`dydx` must contain only finite values.")
     dx = np.diff(x)
-    if np.any(dx <= 0):
-        raise ValueError("`x` must be strictly increasing sequence.")
+    if check_finite or not assume_sorted:
+        _validate(x, dx, y, dydx, check_finite, assume_sorted)
     y = np.moveaxis(y, axis, 0)
     if dydx is not None:
         dydx = np.moveaxis(dydx, axis, 0)
+    if _probe is not None:
+        _probe.lap('splines.prep_data', start)
     return x, dx, y, axis, dydx
 
+def _all_finite(a):
+    with np.errstate(over='ignore', invalid='ignore'):
+        total = a.sum()
+    return bool(np.isfinite(total)) or bool(np.isfinite(a).all())
+
+def _validate(x, dx, y, dydx, check_finite=True, assume_sorted=False):
+    checked = not assume_sorted and bool((dx > 0).all())
+    increasing = assume_sorted or checked
+    if increasing and not check_finite:
+        return
+    if checked and np.isfinite(x[0]) and np.isfinite(x[-1]):
+        if _all_finite(y) and (dydx is None or _all_finite(dydx)):
+            return
+    if check_finite:
+        if not np.all(np.isfinite(x)):
+            raise ValueError("`x` must contain only finite values.")
+        if not np.all(np.isfinite(y)):
+            raise ValueError("`y` must contain only finite values.")
+        if dydx is not None and not np.all(np.isfinite(dydx)):
+            raise ValueError("`dydx` must contain only finite values.")
+    if not increasing:
+        raise ValueError("`x` must be strictly increasing sequence.")
+
+def hermite_terms(dx, y0, y1, d0, d1):
+    dxr = dx.astype(np.finfo(y0.dtype).dtype, copy=False)
+    dxr = dxr.reshape([dx.shape[0]] + [1] * (y0.ndim - 1))
+    slope = (y1 - y0) / dxr
+    t = (d0 + d1 - 2 * slope) / dxr
+    return [t / dxr, (slope - d0) / dxr - t, d0, y0]
+
+def hermite_coeffs(dx, y, dydx):
+    terms = hermite_terms(dx, y[:-1], y[1:], dydx[:-1], dydx[1:])
+    c = np.empty((4, len(dx)) + y.shape[1:], dtype=terms[0].dtype)
+    for j, term in enumerate(terms):
+        c[j] = term
+    if _probe is not None:
+        _probe.count('splines.coeff_bytes', c.nbytes)
+    return c
+
+_ppoly_c = PPoly.c
+
 class base_alg(PPoly):
-    def __init__(self, x, y, dydx, axis=0, extrapolate=None):
+    def __init__(self, x, y, dydx, axis=0, extrapolate=None, check_finite=True,
+                 assume_sorted=False, dtype=None, hermite=False):
         if extrapolate is None:
             extrapolate = True
-        x, dx, y, axis, dydx = prep_data(x, y, axis, dydx)
-        dxr = dx.reshape([dx.shape[0]] + [1] * (y.ndim - 1))
-        slope = np.diff(y, axis=0) / dxr
-        t = (dydx[:-1] + dydx[1:] - 2 * slope) / dxr
-        c = np.empty((4, len(x) - 1) + y.shape[1:], dtype=t.dtype)
-        c[0] = t / dxr
-        c[1] = (slope - dydx[:-1]) / dxr - t
-        c[2] = dydx[:-1]
-        c[3] = y[:-1]
-        super().__init__(c, x, extrapolate=extrapolate)
+        x, dx, y, axis, dydx = prep_data(x, y, axis, dydx, check_finite, assume_sorted, dtype)
+        if hermite:
+            self._init_knots(x, extrapolate)
+            self._hermite = (np.array(y, order='C'), np.array(dydx, order='C'))
+        else:
+            c = hermite_coeffs(dx, y, dydx)
+            if c.dtype.char in 'dD':
+                super().__init__(c, x, extrapolate=extrapolate)
+            else:
+                self._init_knots(x, extrapolate)
+                self.c = c
         self.axis = axis
 
+    def _init_knots(self, x, extrapolate):
+        super().__init__(np.zeros((1, x.shape[0] - 1)), x, extrapolate=extrapolate)
+
+    @property
+    def c(self):
+        hermite = self.__dict__.get('_hermite')
+        if hermite is None:
+            return _ppoly_c.__get__(self)
+        y, dydx = hermite
+        return hermite_coeffs(np.diff(self.x), y, dydx)
+
+    @c.setter
+    def c(self, value):
+        self.__dict__.pop('_hermite', None)
+        _ppoly_c.__set__(self, value)
+
+    def _as_ppoly(self, double=True):
+        c = self.c
+        if double and c.dtype.char not in 'dD':
+            c = c.astype(np.promote_types(c.dtype, np.float64))
+        elif '_hermite' not in self.__dict__:
+            return self
+        return type(self).construct_fast(c, self.x, self.extrapolate, self.axis)
+
+    def __call__(self, x, nu=0, extrapolate=None):
+        if '_hermite' in self.__dict__:
+            return self.evaluate(x, nu, extrapolate)
+        c = self.c
+        if c.dtype.char not in 'dD' or not c.flags.c_contiguous:
+            return self.evaluate(x, nu, extrapolate)
+        return super().__call__(x, nu, extrapolate)
+
+    def derivative(self, nu=1):
+        if nu < 0:
+            return self.antiderivative(-nu)
+        return PPoly.derivative(self._as_ppoly(double=False), nu)
+
+    def antiderivative(self, nu=1):
+        return PPoly.antiderivative(self._as_ppoly(), nu)
+
+    def integrate(self, a, b, extrapolate=None):
+        return PPoly.integrate(self._as_ppoly(), a, b, extrapolate)
+
+    def solve(self, y=0., discontinuity=True, extrapolate=None):
+        return PPoly.solve(self._as_ppoly(), y, discontinuity, extrapolate)
+
+    def roots(self, discontinuity=True, extrapolate=None):
+        return self.solve(0, discontinuity, extrapolate)
+
+    def extend(self, c, x):
+        if '_hermite' in self.__dict__:
+            self.c = self.c
+        PPoly.extend(self, c, x)
+
+    @classmethod
+    def batch(cls, x, ys, axis=0, **kwargs):
+        ys = [np.asarray(y) for y in ys]
+        if not ys:
+            raise ValueError("`ys` must contain at least one curve.")
+        axis = axis % ys[0].ndim
+        if kwargs.get('dydx') is not None:
+            kwargs['dydx'] = np.stack([np.asarray(d) for d in kwargs['dydx']], axis=-1)
+        bc_type = kwargs.get('bc_type')
+        if bc_type is not None and not isinstance(bc_type, str):
+            curve_shape = ys[0].shape[:axis] + ys[0].shape[axis + 1:]
+            kwargs['bc_type'] = tuple(
+                bc if isinstance(bc, str) else cls._batch_bc(bc, curve_shape, len(ys))
+                for bc in bc_type)
+        return cls(x, np.stack(ys, axis=-1), axis=axis, **kwargs)
+
+    @staticmethod
+    def _batch_bc(bc, curve_shape, count):
+        try:
+            order, value = bc
+        except Exception:
+            return bc
+        value = np.asarray(value)
+        if value.shape == curve_shape:
+            value = value[..., np.newaxis]
+        try:
+            return order, np.broadcast_to(value, curve_shape + (count,))
+        except ValueError:
+            return order, value
+
+    def evaluate(self, x, nu=0, extrapolate=None, assume_sorted=None, out=None):
+        scalar = _isscalar(nu)
+        orders = [nu] if scalar else list(nu)
+        if not orders:
+            raise ValueError("`nu` must contain at least one derivative order.")
+        for order in orders:
+            if order < 0:
+                raise ValueError("Order of derivative cannot be negative: %s" % order)
+        if extrapolate is None:
+            extrapolate = self.extrapolate
+        x = np.asarray(x)
+        x_shape, x_ndim = x.shape, x.ndim
+        xs = np.ascontiguousarray(x.ravel(), dtype=np.float64)
+        knots = self.x
+        if extrapolate == 'periodic':
+            xs = knots[0] + (xs - knots[0]) % (knots[-1] - knots[0])
+            extrapolate = False
+            assume_sorted = None
+        c = None if '_hermite' in self.__dict__ else self.c
+        k, trailing, dtype = self._layout(c)
+        shape = (len(orders),) + x_shape + trailing
+        perm = list(range(1, len(shape)))
+        perm = [0] + perm[x_ndim:x_ndim + self.axis] + perm[:x_ndim] + perm[x_ndim + self.axis:]
+        flat = (len(orders), xs.shape[0]) + trailing
+        if out is None:
+            res = np.empty(shape, dtype=dtype)
+            w = res.reshape(flat)
+        else:
+            expected = tuple(shape[i] for i in perm)[scalar:]
+            if out.shape != expected:
+                raise ValueError(f"`out` must have shape {expected}.")
+            res = (out[np.newaxis] if scalar else out).transpose(np.argsort(perm))
+            w = res.reshape(flat)
+            if w.dtype != dtype or not np.may_share_memory(w, res):
+                w = np.empty(flat, dtype=dtype)
+        gather = self._locate(xs, knots, assume_sorted)
+        t = xs - gather(knots[:-1])
+        coefs = self._coefficients(gather, knots, c, k - min(orders))
+        for order, wk in zip(orders, w):
+            self._polyval(t, coefs, k, order, wk)
+            if k - order <= 1:
+                wk[np.isnan(xs)] = np.nan
+        if not extrapolate:
+            w[:, (xs < knots[0]) | (xs > knots[-1])] = np.nan
+        if out is None:
+            res = res.transpose(perm)
+            return res[0] if scalar else res
+        if not np.may_share_memory(w, res):
+            res[...] = w.reshape(shape)
+        return out
+
+    def _layout(self, c):
+        if c is not None:
+            return c.shape[0], c.shape[2:], c.dtype
+        y = self._hermite[0]
+        return 4, y.shape[1:], y.dtype
+
+    def _coefficients(self, gather, knots, c, count):
+        if count <= 0:
+            return []
+        if c is not None:
+            return [gather(c[j]) for j in range(count)]
+        y, dydx = self._hermite
+        dx = gather(knots[1:]) - gather(knots[:-1])
+        return hermite_terms(dx, gather(y[:-1]), gather(y[1:]), gather(dydx[:-1]), gather(dydx[1:]))[:count]
+
+    @staticmethod
+    def _polyval(t, coefs, k, nu, w):
+        if k <= nu:
+            w[...] = 0
+            return w
+        t = t.reshape((-1,) + (1,) * (w.ndim - 1))
+        z = tmp = None
+        for kp in range(nu, k):
+            scale = math.perm(kp, nu)
+            if z is None:
+                np.multiply(coefs[k - 1 - kp], scale, out=w)
+                z = t
+                continue
+            tmp = np.multiply(coefs[k - 1 - kp], z, out=tmp)
+            if scale != 1:
+                tmp *= scale
+            w += tmp
+            if kp < k - 1:
+                z = z * t
+        return w
+
+    def _locate(self, xs, knots, assume_sorted=None):
+        m = knots.shape[0]
+        if assume_sorted is None:
+            assume_sorted = xs.shape[0] > m and bool(np.all(xs[1:] >= xs[:-1]))
+        if assume_sorted:
+            bounds = np.searchsorted(xs, knots[1:-1], side='left')
+            counts = np.diff(bounds, prepend=0, append=xs.shape[0])
+            return lambda a: np.repeat(a, counts, axis=0)
+        step = self._uniform_step(knots)
+        if step is not None:
+            idx = np.floor((xs - knots[0]) / step)
+            np.fmax(idx, 0, out=idx)
+            np.fmin(idx, m - 2, out=idx)
+            idx = idx.astype(np.intp)
+            idx -= (xs < knots[idx]) & (idx > 0)
+            idx += (xs >= knots[idx + 1]) & (idx < m - 2)
+        else:
+            idx = np.searchsorted(knots, xs, side='right') - 1
+            np.clip(idx, 0, m - 2, out=idx)
+        return lambda a: np.take(a, idx, axis=0)
+
+    def _uniform_step(self, knots):
+        cached = getattr(self, '_grid', None)
+        if cached is not None and cached[0] is knots:
+            return cached[1]
+        m = knots.shape[0]
+        step = (knots[-1] - knots[0]) / (m - 1)
+        drift = np.abs(knots - (knots[0] + step * np.arange(m))).max()
+        self._grid = (knots, step if drift <= 0.25 * step else None)
+        return self._grid[1]
+
 class alg2(base_alg):
-    def __init__(self, x, y, axis=0, extrapolate=None):
-        x, _, y, axis, _ = prep_data(x, y, axis)
+    def __init__(self, x, y, axis=0, extrapolate=None, check_finite=True,
+                 assume_sorted=False, dtype=None, hermite=False):
+        x, _, y, axis, _ = prep_data(x, y, axis, None, check_finite, assume_sorted, dtype)
         if np.iscomplexobj(y):
             msg = ("`alg2` only works with real values for `y`. "
                    "If you are trying to use the real components of the passed array, "
                    "use `np.real` on the array before passing to `alg2`.")
             raise ValueError(msg)
-        xp = x.reshape((x.shape[0],) + (1,)*(y.ndim-1))
+        xp = x.reshape((x.shape[0],) + (1,)*(y.ndim-1)).astype(y.dtype, copy=False)
         dk = self._find_derivatives(xp, y)
-        super().__init__(x, y, dk, axis=0, extrapolate=extrapolate)
+        super().__init__(x, y, dk, axis=0, extrapolate=extrapolate,
+                         check_finite=False, assume_sorted=True, dtype=y.dtype, hermite=hermite)
         self.axis = axis
+        self._y_end = y[-1].copy()
+        self._bufs = None
+        self._owner = (self.x, self._storage())
+
+    def _storage(self):
+        hermite = self.__dict__.get('_hermite')
+        return _ppoly_c.__get__(self) if hermite is None else hermite
+
+    def append(self, x_new, y_new):
+        # Coefficients are rewritten in place in a growing buffer, so arrays
+        # read earlier from `c` see the changes to the last two intervals.
+        if '_owner' not in self.__dict__:
+            raise ValueError("`append` needs a spline built by `alg2`, not by "
+                             "`construct_fast` or a method returning a new spline.")
+        x_old = self.x
+        n = x_old.shape[0]
+        hermite = self.__dict__.get('_hermite')
+        c = self.c if hermite is None else None
+        if self._owner[0] is not x_old or self._owner[1] is not self._storage():
+            if hermite is None:
+                if c.shape[0] != 4:
+                    raise ValueError("`append` needs cubic coefficients.")
+                h = x_old[-1] - x_old[-2]
+                self._y_end = ((c[0, -1] * h + c[1, -1]) * h + c[2, -1]) * h + c[3, -1]
+            self._bufs = None
+        _, trailing, dtype = self._layout(c)
+        x_new = float(x_new)
+        y_new = np.asarray(y_new, dtype=float)
+        if y_new.shape != trailing:
+            raise ValueError(f"`y_new` must have shape {trailing}.")
+        if not np.isfinite(x_new):
+            raise ValueError("`x` must contain only finite values.")
+        if not np.all(np.isfinite(y_new)):
+            raise ValueError("`y` must contain only finite values.")
+        if not x_new > x_old[-1]:
+            raise ValueError("`x` must be strictly increasing sequence.")
+        lo = max(n - 2, 0)
+        xw = np.empty(n - lo + 1)
+        xw[:-1] = x_old[lo:]
+        xw[-1] = x_new
+        yw = np.empty((n - lo + 1,) + trailing, dtype=dtype)
+        if hermite is None:
+            yw[:-2] = c[3, lo:]
+            yw[-2] = self._y_end
+        else:
+            yw[:-1] = hermite[0][lo:]
+        yw[-1] = y_new
+        xp = xw.reshape((xw.shape[0],) + (1,) * len(trailing)).astype(dtype, copy=False)
+        dk = self._find_derivatives(xp, yw)
+        if lo > 0:
+            dk[0] = c[2, lo] if hermite is None else hermite[1][lo]
+        if self._bufs is None or self._bufs[0].shape[0] == n:
+            cap = max(2 * n, 4)
+            x_buf = np.empty(cap)
+            x_buf[:n] = x_old
+            if hermite is None:
+                bufs = [np.empty((4, cap - 1) + trailing, dtype=dtype)]
+                bufs[0][:, :n - 1] = c
+            else:
+                bufs = [np.empty((cap,) + trailing, dtype=dtype) for _ in hermite]
+                for buf, values in zip(bufs, hermite):
+                    buf[:n] = values
+            self._bufs = (x_buf, *bufs)
+            if _probe is not None:
+                _probe.count('splines.coeff_bytes', sum(buf.nbytes for buf in bufs))
+        x_buf = self._bufs[0]
+        x_buf[n] = x_new
+        self.x = x_buf[:n + 1]
+        grid = getattr(self, '_grid', None)
+        if grid is not None and grid[0] is x_old:
+            step = grid[1]
+            if step is not None and abs(x_new - (x_old[0] + step * n)) > 0.25 * step:
+                step = None
+            self._grid = (self.x, step)
+        if hermite is None:
+            c_buf = self._bufs[1]
+            c_buf[:, lo:n] = hermite_coeffs(np.diff(xw), yw, dk)
+            self.c = c_buf[:, :n]
+        else:
+            y_buf, d_buf = self._bufs[1:]
+            y_buf[n] = yw[-1]
+            d_buf[lo:n + 1] = dk
+            self._hermite = (y_buf[:n + 1], d_buf[:n + 1])
+        self._y_end = yw[-1].copy()
+        self._owner = (self.x, self._storage())
 
     @staticmethod
     def _edge_case(h0, h1, m0, m1):
@@ -110,8 +448,10 @@ class alg2(base_alg):
         dk[-1] = alg2._edge_case(hk[-1], hk[-2], mk[-1], mk[-2])
         return dk.reshape(y_shape)
 
-def apply_alg2(xi, yi, x, der=0, axis=0):
+def apply_alg2(xi, yi, x, der=0, axis=0, stacked=False):
     P = alg2(xi, yi, axis=axis)
+    if stacked:
+        return P.evaluate(x, [der] if _isscalar(der) else der)
     if der == 0:
         return P(x)
     elif _isscalar(der):
@@ -119,9 +459,70 @@ def apply_alg2(xi, yi, x, der=0, axis=0):
     else:
         return [P.derivative(nu)(x) for nu in der]
 
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+class lu_cache:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, x):
+        entry = self._data.get(key)
+        if entry is not None and np.array_equal(entry[0], x):
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key, x, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (x.copy(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self._data) > max(maxsize, 0):
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+def _gt_factor(ab):
+    if ab.shape[1] == 2:
+        ab = np.pad(ab, ((0, 0), (0, 1)))
+        ab[1, -1] = 1
+    gttrf = get_lapack_funcs('gttrf', (ab,))
+    dl, d, du, du2, ipiv, info = gttrf(ab[2, :-1], ab[1, :], ab[0, 1:])
+    if info > 0:
+        raise LinAlgError("singular matrix")
+    return dl, d, du, du2, ipiv
+
+def _gt_solve(lu, b):
+    m = b.shape[0]
+    rhs = b.reshape(m, -1)
+    if np.iscomplexobj(rhs):
+        return (_gt_solve(lu, rhs.real) + 1j * _gt_solve(lu, rhs.imag)).reshape(b.shape)
+    if lu[1].shape[0] > m:
+        rhs = np.concatenate([rhs, np.zeros((lu[1].shape[0] - m, rhs.shape[1]))])
+    gttrs = get_lapack_funcs('gttrs', (lu[1], rhs))
+    s, info = gttrs(*lu, rhs)
+    return s[:m].reshape(b.shape)
+
 class alg1(base_alg):
-    def __init__(self, x, y, axis=0, bc_type='not-a-knot', extrapolate=None):
-        x, dx, y, axis, _ = prep_data(x, y, axis)
+    def __init__(self, x, y, axis=0, bc_type='not-a-knot', extrapolate=None,
+                 check_finite=True, assume_sorted=False, dtype=None, hermite=False):
+        x, dx, y, axis, _ = prep_data(x, y, axis, None, check_finite, assume_sorted, dtype)
         n = len(x)
         bc, y = self._validate_bc(bc_type, y, y.shape[1:], axis)
         if extrapolate is None:
@@ -129,10 +530,14 @@ class alg1(base_alg):
                 extrapolate = 'periodic'
             else:
                 extrapolate = True
+        probe = _probe
         if y.size == 0:
+            if probe is not None:
+                probe.count('splines.alg1.branch.empty')
             s = np.zeros_like(y)
         else:
-            dxr = dx.reshape([dx.shape[0]] + [1] * (y.ndim - 1))
+            dxr = dx.astype(np.finfo(y.dtype).dtype, copy=False)
+            dxr = dxr.reshape([dx.shape[0]] + [1] * (y.ndim - 1))
             slope = np.diff(y, axis=0) / dxr
             if n == 2:
                 if bc[0] in ['not-a-knot', 'periodic']:
@@ -153,44 +558,44 @@ class alg1(base_alg):
                 b[1] = 3 * (dxr[0] * slope[1] + dxr[1] * slope[0])
                 b[2] = 2 * slope[1]
                 m = b.shape[0]
+                if probe is not None:
+                    probe.count('splines.alg1.branch.three-point-not-a-knot')
+                    start = probe.clock()
                 s = solve(A, b.reshape(m, -1), overwrite_a=True, overwrite_b=True,
                           check_finite=False).reshape(b.shape)
+                if probe is not None:
+                    probe.lap('splines.alg1.solve', start)
             elif n == 3 and bc[0] == 'periodic':
+                if probe is not None:
+                    probe.count('splines.alg1.branch.three-point-periodic')
                 t = (slope / dxr).sum(0) / (1. / dxr).sum(0)
                 s = np.broadcast_to(t, (n,) + y.shape[1:])
             else:
-                A = np.zeros((3, n))
                 b = np.empty((n,) + y.shape[1:], dtype=y.dtype)
-                A[1, 1:-1] = 2 * (dx[:-1] + dx[1:])
-                A[0, 2:] = dx[:-1]
-                A[-1, :-2] = dx[1:]
                 b[1:-1] = 3 * (dxr[1:] * slope[:-1] + dxr[:-1] * slope[1:])
                 bc_start, bc_end = bc
+                if probe is not None:
+                    branch = 'two-point' if n == 2 else 'periodic' if bc_start == 'periodic' else 'tridiagonal'
+                    probe.count('splines.alg1.branch.' + branch)
+                    start = probe.clock()
+                lu = self._factorize(x, dx, bc_start, bc_end)
+                if probe is not None:
+                    probe.lap('splines.alg1.factorize', start)
                 if bc_start == 'periodic':
-                    A = A[:, 0:-1]
-                    A[1, 0] = 2 * (dx[-1] + dx[0])
-                    A[0, 1] = dx[-1]
+                    lu, s2 = lu
                     b = b[:-1]
                     a_m1_0 = dx[-2]
                     a_m1_m2 = dx[-1]
                     a_m1_m1 = 2 * (dx[-1] + dx[-2])
-                    a_m2_m1 = dx[-3]
-                    a_0_m1 = dx[0]
                     b[0] = 3 * (dxr[0] * slope[-1] + dxr[-1] * slope[0])
                     b[-1] = 3 * (dxr[-1] * slope[-2] + dxr[-2] * slope[-1])
-                    Ac = A[:, :-1]
                     b1 = b[:-1]
-                    b2 = np.zeros_like(b1)
-                    b2[0] = -a_0_m1
-                    b2[-1] = -a_m2_m1
-                    m = b1.shape[0]
-                    s1 = solve_banded((1, 1), Ac, b1.reshape(m, -1), overwrite_ab=False,
-                                      overwrite_b=False, check_finite=False)
-                    s1 = s1.reshape(b1.shape)
-                    m = b2.shape[0]
-                    s2 = solve_banded((1, 1), Ac, b2.reshape(m, -1), overwrite_ab=False,
-                                      overwrite_b=False, check_finite=False)
-                    s2 = s2.reshape(b2.shape)
+                    if probe is not None:
+                        start = probe.clock()
+                    s1 = _gt_solve(lu, b1)
+                    if probe is not None:
+                        probe.lap('splines.alg1.solve', start)
+                    s2 = s2.reshape((b1.shape[0],) + (1,) * (b1.ndim - 1))
                     s_m1 = ((b[-1] - a_m1_0 * s1[0] - a_m1_m2 * s1[-1]) /
                             (a_m1_m1 + a_m1_0 * s2[0] + a_m1_m2 * s2[-1]))
                     s = np.empty((n,) + y.shape[1:], dtype=y.dtype)
@@ -199,40 +604,88 @@ class alg1(base_alg):
                     s[-1] = s[0]
                 else:
                     if bc_start == 'not-a-knot':
-                        A[1, 0] = dx[1]
-                        A[0, 1] = x[2] - x[0]
                         d = x[2] - x[0]
                         b[0] = ((dxr[0] + 2*d) * dxr[1] * slope[0] +
                                 dxr[0]**2 * slope[1]) / d
                     elif bc_start[0] == 1:
-                        A[1, 0] = 1
-                        A[0, 1] = 0
                         b[0] = bc_start[1]
                     elif bc_start[0] == 2:
-                        A[1, 0] = 2 * dx[0]
-                        A[0, 1] = dx[0]
                         b[0] = -0.5 * bc_start[1] * dx[0]**2 + 3 * (y[1] - y[0])
                     if bc_end == 'not-a-knot':
-                        A[1, -1] = dx[-2]
-                        A[-1, -2] = x[-1] - x[-3]
                         d = x[-1] - x[-3]
                         b[-1] = ((dxr[-1]**2*slope[-2] +
                                  (2*d + dxr[-1])*dxr[-2]*slope[-1]) / d)
                     elif bc_end[0] == 1:
-                        A[1, -1] = 1
-                        A[-1, -2] = 0
                         b[-1] = bc_end[1]
                     elif bc_end[0] == 2:
-                        A[1, -1] = 2 * dx[-1]
-                        A[-1, -2] = dx[-1]
                         b[-1] = 0.5 * bc_end[1] * dx[-1]**2 + 3 * (y[-1] - y[-2])
-                    m = b.shape[0]
-                    s = solve_banded((1, 1), A, b.reshape(m, -1), overwrite_ab=True,
-                                     overwrite_b=True, check_finite=False)
-                    s = s.reshape(b.shape)
-        super().__init__(x, y, s, axis=0, extrapolate=extrapolate)
+                    if probe is not None:
+                        start = probe.clock()
+                    s = _gt_solve(lu, b)
+                    if probe is not None:
+                        probe.lap('splines.alg1.solve', start)
+        super().__init__(x, y, s, axis=0, extrapolate=extrapolate, check_finite=False,
+                         assume_sorted=True, dtype=np.finfo(y.dtype).dtype, hermite=hermite)
         self.axis = axis
 
+    _lu_cache = None
+
+    @classmethod
+    def cache_info(cls):
+        return cls._lu_cache.info()
+
+    @classmethod
+    def cache_clear(cls):
+        cls._lu_cache.clear()
+
+    @classmethod
+    def set_cache_size(cls, maxsize):
+        cls._lu_cache.resize(maxsize)
+
+    @classmethod
+    def _factorize(cls, x, dx, bc_start, bc_end):
+        kinds = tuple(bc if isinstance(bc, str) else bc[0] for bc in (bc_start, bc_end))
+        key = (x.shape[0], hash(x.tobytes()), kinds)
+        lu = cls._lu_cache.get(key, x)
+        if lu is not None:
+            return lu
+        n = x.shape[0]
+        A = np.zeros((3, n))
+        A[1, 1:-1] = 2 * (dx[:-1] + dx[1:])
+        A[0, 2:] = dx[:-1]
+        A[-1, :-2] = dx[1:]
+        if bc_start == 'periodic':
+            A = A[:, 0:-1]
+            A[1, 0] = 2 * (dx[-1] + dx[0])
+            A[0, 1] = dx[-1]
+            lu = _gt_factor(A[:, :-1])
+            b2 = np.zeros(n - 2)
+            b2[0] = -dx[0]
+            b2[-1] = -dx[-3]
+            lu = (lu, _gt_solve(lu, b2))
+        else:
+            if bc_start == 'not-a-knot':
+                A[1, 0] = dx[1]
+                A[0, 1] = x[2] - x[0]
+            elif bc_start[0] == 1:
+                A[1, 0] = 1
+                A[0, 1] = 0
+            elif bc_start[0] == 2:
+                A[1, 0] = 2 * dx[0]
+                A[0, 1] = dx[0]
+            if bc_end == 'not-a-knot':
+                A[1, -1] = dx[-2]
+                A[-1, -2] = x[-1] - x[-3]
+            elif bc_end[0] == 1:
+                A[1, -1] = 1
+                A[-1, -2] = 0
+            elif bc_end[0] == 2:
+                A[1, -1] = 2 * dx[-1]
+                A[-1, -2] = dx[-1]
+            lu = _gt_factor(A)
+        cls._lu_cache.put(key, x, lu)
+        return lu
+
     @staticmethod
     def _validate_bc(bc_type, y, expected_deriv_shape, axis):
         if isinstance(bc_type, str):
@@ -280,6 +733,8 @@ class alg1(base_alg):
                         f"the expected one {expected_deriv_shape}."
                     )
                 if np.issubdtype(deriv_value.dtype, np.complexfloating):
-                    y = y.astype(complex, copy=False)
+                    y = y.astype(np.result_type(y.dtype, np.complex64), copy=False)
                 validated_bc.append((deriv_order, deriv_value))
         return validated_bc, y
+
+alg1._lu_cache = lu_cache()
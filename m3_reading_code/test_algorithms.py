@@ -0,0 +1,345 @@
+import os
+import sys
+import unittest
+
+# NOTE: algorithms.py keeps the relative imports of the SciPy module it was
+# taken from, so it is loaded through the benchmarks package, which imports it
+# as part of scipy.interpolate. The tests are skipped when SciPy is missing.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_splines import load_algorithms
+from benchmarks.harness import Skip
+
+try:
+    algorithms = load_algorithms()
+except Skip:
+    algorithms = None
+else:
+    import numpy as np
+    from numpy.testing import assert_allclose, assert_array_equal
+    from scipy.interpolate import PPoly
+
+
+def make_data(n, trailing=(), seed=0, uniform=False):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=float) if uniform else np.cumsum(rng.uniform(0.5, 1.5, n))
+    return x, rng.standard_normal((n,) + trailing)
+
+
+@unittest.skipIf(algorithms is None, "SciPy is not installed")
+class TestPrepData(unittest.TestCase):
+    """Tests for the input validation shared by every spline."""
+
+    def test_messages(self):
+        """Tests that each invalid input is reported with its own message."""
+        x, y = make_data(6)
+        cases = [
+            (x[::-1], y, "strictly increasing"),
+            (np.where(np.arange(6) == 3, np.nan, x), y, "`x` must contain only finite"),
+            (x, np.where(np.arange(6) == 0, np.inf, y), "`y` must contain only finite"),
+            (x[:1], y[:1], "at least 2 elements"),
+            (x, y[:5], "doesn't match the length"),
+        ]
+        for bad_x, bad_y, message in cases:
+            with self.assertRaisesRegex(ValueError, message):
+                algorithms.prep_data(bad_x, bad_y, 0)
+
+    def test_assume_sorted_skips_order_check(self):
+        """Tests that assume_sorted trusts the order but still checks finiteness."""
+        x, y = make_data(6)
+        unsorted = x[[0, 2, 1, 3, 4, 5]]
+        algorithms.prep_data(unsorted, y, 0, assume_sorted=True)
+        algorithms.prep_data(unsorted, y, 0, check_finite=False, assume_sorted=True)
+        with self.assertRaisesRegex(ValueError, "`y` must contain only finite"):
+            algorithms.prep_data(unsorted, np.where(np.arange(6) == 2, np.nan, y), 0, assume_sorted=True)
+        with self.assertRaisesRegex(ValueError, "`x` must contain only finite"):
+            algorithms.prep_data([0., np.nan, 2., 3.], y[:4], 0, assume_sorted=True)
+        with self.assertRaisesRegex(ValueError, "strictly increasing"):
+            algorithms.prep_data(unsorted, y, 0, check_finite=False)
+
+
+@unittest.skipIf(algorithms is None, "SciPy is not installed")
+class TestAppend(unittest.TestCase):
+    """Tests for alg2.append, the streaming update of a monotone spline."""
+
+    def test_matches_full_refit(self):
+        """Tests that appending knots one at a time gives the same spline as fitting them all."""
+        for trailing in ((), (3,)):
+            x, y = make_data(40, trailing)
+            spline = algorithms.alg2(x[:3], y[:3])
+            for i in range(3, len(x)):
+                spline.append(x[i], y[i])
+                refit = algorithms.alg2(x[:i + 1], y[:i + 1])
+                assert_array_equal(spline.x, refit.x)
+                assert_array_equal(spline.c, refit.c)
+            xq = np.linspace(x[0] - 1, x[-1] + 1, 97)
+            assert_array_equal(spline(xq), refit(xq))
+            assert_array_equal(spline(xq, 1), refit(xq, 1))
+
+    def test_call_after_append_does_not_copy(self):
+        """Tests that evaluating after append leaves the coefficient buffer in place."""
+        x, y = make_data(20)
+        spline = algorithms.alg2(x[:10], y[:10])
+        for i in range(10, 20):
+            spline.append(x[i], y[i])
+            c = spline.c
+            spline(x[i] - 0.25)
+            self.assertIs(spline.c, c)
+            self.assertTrue(np.shares_memory(spline.c, spline._bufs[1]))
+
+    def test_uniform_grid_cache_follows_append(self):
+        """Tests that append updates the uniform-grid lookup instead of invalidating it."""
+        x, y = make_data(50, uniform=True)
+        spline = algorithms.alg2(x[:20], y[:20])
+        xq = np.random.default_rng(2).uniform(-1, 51, 300)
+        spline.evaluate(xq)
+        for i in range(20, 50):
+            spline.append(x[i], y[i])
+            self.assertIs(spline._grid[0], spline._x)
+            self.assertEqual(spline._grid[1], 1.0)
+        assert_array_equal(spline.evaluate(xq), algorithms.alg2(x, y)(xq))
+        spline.append(50.6, 0.0)
+        self.assertIsNone(spline._grid[1])
+        refit = algorithms.alg2(np.append(x, 50.6), np.append(y, 0.0))
+        assert_array_equal(spline.evaluate(xq), refit(xq))
+
+    def test_append_after_extend(self):
+        """Tests that append picks up knots and coefficients that extend replaced."""
+        for hermite in (False, True):
+            x, y = make_data(12)
+            full = algorithms.alg2(x[:9], y[:9])
+            spline = algorithms.alg2(x[:6], y[:6], hermite=hermite)
+            spline.append(x[6], y[6])
+            spline.extend(full.c[:, 6:8], x[7:9])
+            for i in range(9, 12):
+                spline.append(x[i], y[i])
+            assert_array_equal(spline.x, x)
+            assert_allclose(spline(x), y, rtol=1e-13, atol=1e-13)
+            assert_allclose(spline.c[:, :6], algorithms.alg2(x[:7], y[:7]).c[:, :6], rtol=1e-13)
+
+    def test_append_needs_alg2_state(self):
+        """Tests that splines made without the constructor refuse to append."""
+        x, y = make_data(8)
+        spline = algorithms.alg2(x, y)
+        for other in (spline.derivative(),
+                      algorithms.alg2.construct_fast(spline.c, spline.x)):
+            with self.assertRaisesRegex(ValueError, "built by `alg2`"):
+                other.append(x[-1] + 1, 0.0)
+
+    def test_rejects_bad_points(self):
+        """Tests that append validates the new point like the constructor does."""
+        x, y = make_data(5)
+        spline = algorithms.alg2(x, y)
+        for bad_x, bad_y in ((x[-1], 0.0), (np.nan, 0.0), (x[-1] + 1, np.inf)):
+            with self.assertRaises(ValueError):
+                spline.append(bad_x, bad_y)
+        with self.assertRaises(ValueError):
+            spline.append(x[-1] + 1, [0.0, 1.0])
+
+
+@unittest.skipIf(algorithms is None, "SciPy is not installed")
+class TestEvaluate(unittest.TestCase):
+    """Tests that base_alg.evaluate gives exactly what PPoly.__call__ gives."""
+
+    def check(self, spline, xq, **kwargs):
+        for nu in (0, 1, 2, 3, 4):
+            expected = PPoly.__call__(spline, xq, nu, kwargs.get('extrapolate'))
+            assert_array_equal(spline.evaluate(xq, nu, **kwargs), expected)
+        stacked = spline.evaluate(xq, [0, 2], **kwargs)
+        assert_array_equal(stacked[1], PPoly.__call__(spline, xq, 2, kwargs.get('extrapolate')))
+
+    def test_query_orders_and_grids(self):
+        """Tests sorted, unsorted and out-of-range queries on uniform and irregular knots."""
+        rng = np.random.default_rng(1)
+        for uniform in (False, True):
+            x, y = make_data(30, uniform=uniform)
+            spline = algorithms.alg1(x, y)
+            unsorted = rng.uniform(x[0] - 2, x[-1] + 2, 200)
+            unsorted[::17] = x[:12]
+            unsorted[5] = np.nan
+            self.check(spline, unsorted)
+            self.check(spline, np.sort(unsorted[~np.isnan(unsorted)]))
+            self.check(spline, unsorted, extrapolate=False)
+
+    def test_axis_and_trailing_shape(self):
+        """Tests multidimensional y and queries with a non-zero interpolation axis."""
+        x, y = make_data(12, (2, 3))
+        spline = algorithms.alg1(x, np.moveaxis(y, 0, 1), axis=1)
+        xq = np.linspace(x[0], x[-1], 20).reshape(4, 5)
+        self.check(spline, xq)
+        out = np.empty((2, 4, 5, 3))
+        self.assertIs(spline.evaluate(xq, out=out), out)
+        assert_array_equal(out, PPoly.__call__(spline, xq))
+
+    def test_complex(self):
+        """Tests complex coefficients."""
+        x, y = make_data(10)
+        self.check(algorithms.alg1(x, y + 1j * y[::-1]), np.linspace(x[0] - 1, x[-1] + 1, 41))
+
+    def test_periodic(self):
+        """Tests periodic extrapolation."""
+        x = np.linspace(0, 2 * np.pi, 9)
+        spline = algorithms.alg1(x, np.sin(x), bc_type='periodic')
+        self.check(spline, np.linspace(-10, 10, 101), extrapolate='periodic')
+
+
+@unittest.skipIf(algorithms is None, "SciPy is not installed")
+class TestStorageModes(unittest.TestCase):
+    """Tests that float32 and Hermite-form splines support every PPoly method."""
+
+    modes = ({'dtype': np.float32}, {'hermite': True}, {'dtype': np.float32, 'hermite': True})
+
+    def splines(self):
+        x, y = make_data(12, seed=3)
+        for cls in (algorithms.alg1, algorithms.alg2):
+            reference = cls(x, y)
+            for kwargs in self.modes:
+                yield kwargs, reference, cls(x, y, **kwargs)
+
+    def tolerance(self, kwargs):
+        return {'rtol': 1e-5, 'atol': 1e-5} if 'dtype' in kwargs else {'rtol': 1e-13, 'atol': 1e-13}
+
+    def test_methods_match_float64(self):
+        """Tests derivative, antiderivative, integrate, solve and roots against the default spline."""
+        for kwargs, reference, spline in self.splines():
+            tol = self.tolerance(kwargs)
+            x = reference.x
+            xq = np.linspace(x[0], x[-1], 50)
+            with self.subTest(cls=type(spline).__name__, **kwargs):
+                assert_allclose(spline.c, reference.c, **tol)
+                assert_allclose(spline(xq), reference(xq), **tol)
+                assert_allclose(spline.derivative()(xq), reference.derivative()(xq), **tol)
+                assert_allclose(spline.derivative(2)(xq), reference.derivative(2)(xq), **tol)
+                assert_allclose(spline.antiderivative()(xq), reference.antiderivative()(xq), **tol)
+                assert_allclose(spline.integrate(x[0], x[-1]), reference.integrate(x[0], x[-1]), **tol)
+                level = reference(xq[20])
+                assert_allclose(spline.solve(level), reference.solve(level), rtol=1e-4, atol=1e-4)
+                assert_allclose(spline.roots(), reference.roots(), rtol=1e-4, atol=1e-4)
+
+    def test_storage_dtype(self):
+        """Tests that the storage modes keep their dtype and leave the coefficients implicit."""
+        x, y = make_data(12)
+        spline = algorithms.alg2(x, y, dtype=np.float32)
+        self.assertEqual(spline(x).dtype, np.float32)
+        self.assertEqual(spline.derivative().c.dtype, np.float32)
+        hermite = algorithms.alg1(x, y, hermite=True)
+        y_stored, dydx = hermite._hermite
+        assert_array_equal(y_stored, y)
+        assert_array_equal(hermite(x[:-1]), algorithms.alg1(x, y)(x[:-1]))
+
+    def test_owns_its_arrays(self):
+        """Tests that changing the caller's arrays afterwards leaves every storage mode alone."""
+        x, y = make_data(12)
+        dydx = np.gradient(y, x)
+        xq = np.linspace(x[0], x[-1], 30)
+        for make in (lambda: algorithms.alg1(x, y), lambda: algorithms.alg2(x, y, hermite=True),
+                     lambda: algorithms.base_alg(x, y, dydx, hermite=True)):
+            spline = make()
+            before = spline(xq)
+            saved = x.copy(), y.copy(), dydx.copy()
+            x[3] += 0.25
+            y[5] = 100.0
+            dydx[7] = -100.0
+            assert_array_equal(spline(xq), before)
+            x[:], y[:], dydx[:] = saved
+
+    def test_extend(self):
+        """Tests that extend converts a Hermite-form spline to coefficients first."""
+        x, y = make_data(12)
+        for kwargs in self.modes:
+            spline = algorithms.alg1(x, y, **kwargs)
+            reference = algorithms.alg1(x, y)
+            extra = np.array([[0.0], [0.0], [1.0], [2.0]])
+            spline.extend(extra, [x[-1] + 1])
+            reference.extend(extra, [x[-1] + 1])
+            self.assertNotIn('_hermite', spline.__dict__)
+            xq = np.linspace(x[0], x[-1] + 1, 30)
+            assert_allclose(spline(xq), reference(xq), **self.tolerance(kwargs))
+
+
+@unittest.skipIf(algorithms is None, "SciPy is not installed")
+class TestFactorizationCache(unittest.TestCase):
+    """Tests for the LU cache shared by alg1 instances."""
+
+    def setUp(self):
+        algorithms.alg1.cache_clear()
+        self.addCleanup(algorithms.alg1.set_cache_size, algorithms.alg1.cache_info().maxsize)
+
+    def test_hits_for_the_same_knots(self):
+        """Tests that a second fit on the same knots reuses the factorization."""
+        x, y = make_data(25, (2,))
+        for bc_type in ('not-a-knot', 'natural', 'periodic'):
+            algorithms.alg1.cache_clear()
+            y_bc = y.copy()
+            y_bc[-1] = y_bc[0]
+            first = algorithms.alg1(x, y_bc, bc_type=bc_type)
+            second = algorithms.alg1(x, 2 * y_bc, bc_type=bc_type)
+            self.assertEqual(algorithms.alg1.cache_info()[:2], (1, 1))
+            assert_allclose(second.c, 2 * first.c, rtol=1e-12, atol=1e-12)
+
+    def test_matches_uncached(self):
+        """Tests that cached factorizations give the same coefficients as fresh ones."""
+        x, y = make_data(25)
+        algorithms.alg1(x, y)
+        cached = algorithms.alg1(x, y[::-1].copy())
+        algorithms.alg1.set_cache_size(0)
+        fresh = algorithms.alg1(x, y[::-1].copy())
+        assert_array_equal(cached.c, fresh.c)
+        self.assertEqual(algorithms.alg1.cache_info().currsize, 0)
+
+    def test_different_knots_miss(self):
+        """Tests that moving one knot does not reuse a stale factorization."""
+        x, y = make_data(25)
+        algorithms.alg1(x, y)
+        x = x.copy()
+        x[5] += 0.1
+        algorithms.alg1(x, y)
+        self.assertEqual(algorithms.alg1.cache_info()[:2], (0, 2))
+
+
+@unittest.skipIf(algorithms is None, "SciPy is not installed")
+class TestBatch(unittest.TestCase):
+    """Tests that a batch of curves matches fitting each curve on its own."""
+
+    def test_matches_per_curve(self):
+        """Tests alg1 and alg2 batches against one fit per curve."""
+        x, _ = make_data(15)
+        ys = [make_data(15, seed=seed)[1] for seed in range(4)]
+        xq = np.linspace(x[0], x[-1], 33)
+        for cls, kwargs in ((algorithms.alg1, {}), (algorithms.alg1, {'bc_type': 'natural'}),
+                            (algorithms.alg2, {})):
+            batch = cls.batch(x, ys, **kwargs)
+            values = batch(xq)
+            self.assertEqual(values.shape, (33, 4))
+            for i, y in enumerate(ys):
+                single = cls(x, y, **kwargs)
+                assert_allclose(batch.c[..., i], single.c, rtol=1e-13, atol=1e-13)
+                assert_allclose(values[:, i], single(xq), rtol=1e-13, atol=1e-13)
+
+    def test_derivative_bc_values(self):
+        """Tests that bc_type derivative values are shared by every curve or given one per curve."""
+        x, _ = make_data(12)
+        ys = [make_data(12, seed=seed)[1] for seed in range(3)]
+        slopes = [0.5, -1.0, 2.0]
+        batch = algorithms.alg1.batch(x, ys, bc_type=((1, 0.5), 'natural'))
+        each = algorithms.alg1.batch(x, ys, bc_type=((1, slopes), (2, 0.0)))
+        for i, y in enumerate(ys):
+            single = algorithms.alg1(x, y, bc_type=((1, 0.5), 'natural'))
+            assert_allclose(batch.c[..., i], single.c, rtol=1e-13, atol=1e-13)
+            single = algorithms.alg1(x, y, bc_type=((1, slopes[i]), 'natural'))
+            assert_allclose(each.c[..., i], single.c, rtol=1e-13, atol=1e-13)
+        with self.assertRaises(ValueError):
+            algorithms.alg1.batch(x, ys, bc_type=((1, [0.0, 1.0]), 'natural'))
+
+    def test_hermite_batch(self):
+        """Tests a base_alg batch with explicit derivatives."""
+        x, _ = make_data(10)
+        ys = [make_data(10, seed=seed)[1] for seed in range(3)]
+        dydx = [np.gradient(y, x) for y in ys]
+        batch = algorithms.base_alg.batch(x, ys, dydx=dydx)
+        for i, (y, d) in enumerate(zip(ys, dydx)):
+            assert_allclose(batch.c[..., i], algorithms.base_alg(x, y, d).c, rtol=1e-13, atol=1e-13)
+
+
+if __name__ == '__main__':
+    unittest.main()